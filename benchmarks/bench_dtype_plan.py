@@ -0,0 +1,92 @@
+"""
+Peak memory of holding the three transformed DataFrames at once, like LoadData does,
+with the default dtypes and with the compact dtypes of src/helper/dtype_planner.py.
+
+The transformed synthetic datasets are written once as intermediates, then every mode
+reads them in a fresh process so its peak RSS is measured on its own:
+
+    plain              read as written by the transform without a plan
+    compact on read    read, then converted to the planned dtypes one frame at a time
+    compact on write   written already compacted by the transform and read back as is
+
+Frames are the deep memory usage of the DataFrames. Note that pyarrow already shares the
+Python string objects of repeated values when it reads Parquet / Feather, so the saving
+in peak RSS is smaller than the saving in deep memory usage with those formats.
+
+Run from the project root:
+    python -m benchmarks.bench_dtype_plan --sales-rows 1000000 --marketing-rows 300000 --scraping-rows 100000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_marketing_data, generate_sales_data, generate_scraping_data
+from src.extract.extract_data import peak_rss_mb
+from src.helper.dtype_planner import compact_dtypes, format_memory_report
+from src.helper.intermediate import FORMATS, DataFrameTarget
+from src.transformation.transform_data import transform_marketing_data, transform_sales_data, transform_scraping_data
+
+DATASETS = {
+    'sales': (generate_sales_data, transform_sales_data),
+    'marketing': (generate_marketing_data, transform_marketing_data),
+    'scraping': (generate_scraping_data, transform_scraping_data),
+}
+
+
+def write_transformed(tmp_dir, rows, seed, file_format):
+    for table, (generate, transform) in DATASETS.items():
+        df = transform(generate(rows[table], seed=seed))
+        DataFrameTarget(os.path.join(tmp_dir, f'plain_{table}'), file_format=file_format).write(df)
+        df, report = compact_dtypes(df, table)
+        DataFrameTarget(os.path.join(tmp_dir, f'compact_{table}'), file_format=file_format).write(df)
+        print(format_memory_report(report, table))
+
+
+def hold_frames(tmp_dir, mode, file_format, queue):
+    start = time.perf_counter()
+    frames = []
+    for table in DATASETS:
+        if mode == 'compact on write':
+            frames.append(DataFrameTarget(os.path.join(tmp_dir, f'compact_{table}'), file_format=file_format).read())
+            continue
+        df = DataFrameTarget(os.path.join(tmp_dir, f'plain_{table}'), file_format=file_format).read()
+        if mode == 'compact on read':
+            df, _ = compact_dtypes(df, table)
+        frames.append(df)
+    memory = sum(df.memory_usage(deep=True).sum() for df in frames) / 1024 ** 2
+    queue.put((time.perf_counter() - start, peak_rss_mb(), memory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sales-rows', type=int, default=1_000_000)
+    parser.add_argument('--marketing-rows', type=int, default=300_000)
+    parser.add_argument('--scraping-rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', default='parquet', choices=list(FORMATS))
+    args = parser.parse_args()
+    rows = {'sales': args.sales_rows, 'marketing': args.marketing_rows, 'scraping': args.scraping_rows}
+
+    # A child process inherits the peak RSS of its parent, so the parent never holds the data
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process = context.Process(target=write_transformed, args=(tmp_dir, rows, args.seed, args.format))
+        process.start()
+        process.join()
+
+        print()
+        # CSV does not keep the dtypes, so compacting on write makes no difference there
+        modes = ['plain', 'compact on read'] + (['compact on write'] if args.format != 'csv' else [])
+        for mode in modes:
+            queue = context.Queue()
+            process = context.Process(target=hold_frames, args=(tmp_dir, mode, args.format, queue))
+            process.start()
+            seconds, rss, memory = queue.get()
+            process.join()
+            print(f'{mode:<18} read {seconds:6.2f}s  frames {memory:8.1f} MB  peak RSS {rss:8.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
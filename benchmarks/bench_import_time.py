@@ -0,0 +1,73 @@
+"""
+Import time of the pipeline modules, measured with `python -X importtime` in a fresh
+interpreter per run, and the heavy libraries every module pulls in.
+
+Importing etl_luigi is what every Luigi run (and scheduling) pays, the extract / transform /
+load modules are only imported by the tasks that run them.
+
+Run from the project root:
+    python -m benchmarks.bench_import_time --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = [
+    'etl_luigi',
+    'src.extract.extract_data',
+    'src.validation.validate_data',
+    'src.transformation.transform_data',
+    'src.load.load_data',
+]
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'bs4', 'requests', 'tqdm']
+
+# Prints the peak RSS in MB and the heavy modules imported, after the module itself is imported.
+# On Linux ru_maxrss keeps the peak of the forked parent across exec, VmHWM starts again at exec
+REPORT = ("import json, os, resource, sys; "
+          "status = open('/proc/self/status').read() if os.path.exists('/proc/self/status') else ''; "
+          "hwm = [line.split()[1] for line in status.splitlines() if line.startswith('VmHWM:')]; "
+          "peak = int(hwm[0]) / 1024 if hwm else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 ** 2; "
+          "print(json.dumps([peak, [name for name in {heavy!r} if name in sys.modules]]))")
+
+
+def measure_import(module):
+    """
+    Imports a module in a fresh interpreter.
+
+    Returns:
+        dict: Cumulative import time of the module in seconds (from -X importtime), the peak
+        RSS of the interpreter in MB and the heavy modules it imported.
+    """
+    code = f"import {module}; " + REPORT.format(heavy=HEAVY_MODULES)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             capture_output=True, text=True, check=True)
+    # "import time: self [us] | cumulative | imported package", the module is on the last line of its own
+    cumulative = next(int(line.split('|')[1]) for line in reversed(process.stderr.splitlines())
+                      if line.startswith('import time:') and line.split('|')[2].strip() == module)
+    peak_rss, heavy = json.loads(process.stdout.splitlines()[-1])
+    return {'seconds': cumulative / 1e6, 'peak_rss_mb': peak_rss, 'heavy_modules': heavy}
+
+
+def measure_import_time(module, repeat=5):
+    """
+    Best import time of `repeat` fresh interpreters, see measure_import.
+    """
+    runs = [measure_import(module) for _ in range(repeat)]
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        result = measure_import_time(module, args.repeat)
+        print(f"{module:<36} {result['seconds'] * 1000:8.1f} ms  peak RSS {result['peak_rss_mb']:6.1f} MB  "
+              f"imports {', '.join(result['heavy_modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Write time, read time, read time of a column subset and size on disk of the intermediate
+formats (csv, parquet, feather) handed between the Luigi stages.
+
+Measured on the scraped Kompas articles and on a synthetic sales extract.
+
+Run from the project root:
+    python -m benchmarks.bench_intermediate_formats --sales-rows 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_sales_data
+from src.helper.intermediate import FORMATS, DataFrameTarget
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench(name, df, columns, formats, tmp_dir):
+    print(f'\n{name}: {len(df)} rows, {df.shape[1]} columns, projection {columns}')
+    print(f'{"format":<8} {"write":>8} {"read":>8} {"project":>8} {"size MB":>9}')
+    for file_format in formats:
+        target = DataFrameTarget(os.path.join(tmp_dir, f'{name}_{file_format}'), file_format=file_format)
+        _, write_seconds = _timed(target.write, df)
+        read, read_seconds = _timed(target.read)
+        _, project_seconds = _timed(target.read, columns=columns)
+        assert len(read) == len(df), f'{file_format} read {len(read)} rows instead of {len(df)}'
+        size_mb = os.path.getsize(target.path) / 1024 ** 2
+        print(f'{file_format:<8} {write_seconds:7.2f}s {read_seconds:7.2f}s {project_seconds:7.2f}s {size_mb:9.1f}')
+        target.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scraping-csv', default='data_source/scraping_data/scraping_kompas.csv')
+    parser.add_argument('--sales-rows', type=int, default=10_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS), choices=list(FORMATS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if os.path.exists(args.scraping_csv):
+            bench('scraping', pd.read_csv(args.scraping_csv), ['link', 'tanggal_waktu_publish'], args.formats, tmp_dir)
+        bench('sales', generate_sales_data(args.sales_rows, seed=args.seed), ['link', 'actual_price'], args.formats, tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput of the DWH load methods: row by row INSERT, multi-row INSERT and COPY.
+
+Every method loads the same DataFrame into a scratch copy of a DWH table
+(CREATE TABLE ... LIKE), which is dropped afterwards. Runs against the DWH configured
+in src/helper/.env (data_warehouse/docker-compose.yml).
+
+Run from the project root:
+    python -m benchmarks.bench_load_methods --table scraping --csv data/transform/transform_scraping_data.csv --repeat 20
+"""
+import argparse
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.helper.db_connector import postgres_engine_dwh
+from src.load.load_data import LOAD_METHODS, append_to_dwh
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--table', default='scraping', choices=['sales', 'marketing', 'scraping'])
+    parser.add_argument('--csv', default='data/transform/transform_scraping_data.csv',
+                        help='Transformed CSV loaded into the table')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of times the CSV rows are repeated')
+    parser.add_argument('--methods', nargs='+', default=list(LOAD_METHODS), choices=list(LOAD_METHODS))
+    args = parser.parse_args()
+
+    df = pd.concat([pd.read_csv(args.csv)] * args.repeat, ignore_index=True)
+    scratch_table = f'bench_{args.table}'
+    print(f'{len(df)} rows into a copy of `{args.table}`')
+
+    dwh_engine = postgres_engine_dwh()
+    for method in args.methods:
+        with dwh_engine.begin() as connection:
+            connection.execute(text(f'DROP TABLE IF EXISTS {scratch_table}'))
+            connection.execute(text(f'CREATE TABLE {scratch_table} (LIKE {args.table} INCLUDING DEFAULTS)'))
+        try:
+            start = time.perf_counter()
+            append_to_dwh(df, scratch_table, method=method)
+            elapsed = time.perf_counter() - start
+            with dwh_engine.connect() as connection:
+                loaded = connection.execute(text(f'SELECT COUNT(*) FROM {scratch_table}')).scalar()
+        finally:
+            with dwh_engine.begin() as connection:
+                connection.execute(text(f'DROP TABLE IF EXISTS {scratch_table}'))
+        assert loaded == len(df), f'{method} loaded {loaded} rows instead of {len(df)}'
+        print(f'{method:<7} {elapsed:7.2f}s  {len(df) / elapsed:10.0f} rows/sec')
+
+
+if __name__ == '__main__':
+    main()
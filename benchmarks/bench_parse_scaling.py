@@ -0,0 +1,49 @@
+"""
+Scaling benchmark of the parse stage across cores.
+
+Parses a directory of cached article pages with the same process pool the scraper
+uses for its parse stage, for an increasing number of workers.
+
+Run from the project root:
+    python -m benchmarks.bench_parse_scaling --html-dir path/to/cached/pages --workers 1 2 4 8
+Without --html-dir, synthetic pages with the Kompas markup are used.
+"""
+import argparse
+import os
+import time
+from functools import partial
+
+from benchmarks.bench_parsing import load_pages
+from src.extract.article_parser import PARSER_BACKENDS, parse_article
+from src.extract.scraping_engine import start_parse_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--html-dir', help='Directory of cached article pages (*.html)')
+    parser.add_argument('--synthetic-pages', type=int, default=20)
+    parser.add_argument('--backend', choices=PARSER_BACKENDS, default='strainer')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    pages = load_pages(args.html_dir, args.synthetic_pages)
+    if not pages:
+        parser.error(f'No *.html pages found in {args.html_dir}')
+    parse = partial(parse_article, backend=args.backend)
+    print(f'{len(pages)} pages, backend={args.backend}, {os.cpu_count()} cores')
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        parse_executor = start_parse_pool(workers)
+        try:
+            start = time.perf_counter()
+            list(parse_executor.map(parse, pages, chunksize=4))
+            elapsed = time.perf_counter() - start
+        finally:
+            parse_executor.shutdown()
+        baseline = baseline or elapsed
+        print(f'workers={workers:<3} {len(pages) / elapsed:8.1f} pages/sec  speedup={baseline / elapsed:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
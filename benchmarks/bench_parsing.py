@@ -0,0 +1,61 @@
+"""
+Micro-benchmark of the article parser backends over saved HTML pages.
+
+Every backend must extract exactly the same fields as the reference 'html.parser'
+backend, the benchmark fails otherwise.
+
+Run from the project root:
+    python -m benchmarks.bench_parsing --html-dir path/to/saved/articles --repeat 3
+Without --html-dir, synthetic pages with the Kompas markup are used.
+"""
+import argparse
+import glob
+import os
+import time
+
+from benchmarks.fake_kompas_server import render_article
+from src.extract.article_parser import PARSER_BACKENDS, lxml, parse_article
+
+
+def load_pages(html_dir, synthetic_pages):
+    if html_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(html_dir, '*.html'))):
+            with open(path, encoding='utf-8') as file:
+                pages.append(file.read())
+        return pages
+    return [render_article(page, number, paragraphs=40) for page in range(1, synthetic_pages + 1) for number in range(1, 11)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--html-dir', help='Directory of saved article pages (*.html)')
+    parser.add_argument('--synthetic-pages', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.html_dir, args.synthetic_pages)
+    if not pages:
+        parser.error(f'No *.html pages found in {args.html_dir}')
+    backends = [backend for backend in PARSER_BACKENDS if backend != 'lxml' or lxml is not None]
+    reference = [parse_article(html, backend='html.parser') for html in pages]
+    size_mb = sum(len(html.encode('utf-8')) for html in pages) / 1e6
+    print(f'{len(pages)} pages, {size_mb:.1f} MB of HTML')
+
+    for backend in backends:
+        # Extracted fields must be identical to the reference backend
+        results = [parse_article(html, backend=backend) for html in pages]
+        for html_number, (result, expected) in enumerate(zip(results, reference)):
+            assert result == expected, f'{backend} differs from html.parser on page {html_number}'
+
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for html in pages:
+                parse_article(html, backend=backend)
+            best = min(best, time.perf_counter() - start)
+        print(f'{backend:<12} {len(pages) / best:8.1f} pages/sec  {best * 1000 / len(pages):6.2f} ms/page')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Speedup of the range-partitioned sales extract vs. the number of partitions.
+
+Runs against the sales database configured in src/helper/.env (the local Postgres of
+data_source/sales_data/docker-compose.yml).
+
+Run from the project root:
+    python -m benchmarks.bench_sales_partitions --partitions 1 2 4 8 [--partition-column "Unnamed: 0"]
+"""
+import argparse
+import tempfile
+
+from src.extract.extract_data import extract_sales_data_partitioned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--partitions', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--partition-column', default=None, help='Numeric key column, ctid ranges when omitted')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    baseline = None
+    for partitions in args.partitions:
+        with tempfile.TemporaryDirectory() as output_dir:
+            report = extract_sales_data_partitioned(output_dir,
+                                                    partitions=partitions,
+                                                    partition_column=args.partition_column,
+                                                    chunksize=args.chunksize)
+        baseline = baseline or report['seconds']
+        print(f"partitions={partitions:<3} rows={report['rows']:<9} time={report['seconds']:.2f}s "
+              f"throughput={report['rows_per_second']:.0f} rows/sec speedup={baseline / report['seconds']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
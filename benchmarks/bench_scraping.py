@@ -0,0 +1,51 @@
+"""
+Offline throughput benchmark of the Kompas scraper against a local fake server.
+
+Run from the project root:
+    python -m benchmarks.bench_scraping --pages 5 --latency 0.05 --concurrency 1 4 16
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fake_kompas_server import FakeKompasServer
+from src.extract.extract_data import extract_scraping_data
+
+
+def run(pages, articles_per_page, latency, concurrency, error_rate=0.0, parse_workers=0):
+    with FakeKompasServer(articles_per_page=articles_per_page, latency=latency, error_rate=error_rate) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        # The pages of the fake server are cached in the temporary directory, not in the
+        # production cache, where replay_scraping_data would take them for real articles
+        df = extract_scraping_data(pages=pages,
+                                   archive_dir=tmp,
+                                   cache_dir=os.path.join(tmp, 'html_cache'),
+                                   concurrency=concurrency,
+                                   rate_limit=None,
+                                   parse_workers=parse_workers,
+                                   index_url=server.index_url)
+        elapsed = time.perf_counter() - start
+    return len(df), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--articles-per-page', type=int, default=15)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of simulated latency per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with a transient 503')
+    parser.add_argument('--parse-workers', type=int, default=0, help='Processes of the parse stage, 0 parses in the fetch threads')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    os.makedirs('log', exist_ok=True)
+    for concurrency in args.concurrency:
+        rows, elapsed = run(args.pages, args.articles_per_page, args.latency, concurrency, args.error_rate, args.parse_workers)
+        print(f'concurrency={concurrency:<3} articles={rows:<5} time={elapsed:.2f}s '
+              f'throughput={rows / elapsed:.1f} articles/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Peak memory and runtime of the in-memory transforms against the streaming (chunk by chunk)
+transforms, on synthetic raw data written as an intermediate file.
+
+Every mode runs in a fresh process so its peak RSS is measured on its own, and both modes
+must produce the same rows.
+
+Run from the project root:
+    python -m benchmarks.bench_streaming_transform --dataset sales --rows 2000000 --chunksize 100000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_marketing_data, generate_sales_data, generate_scraping_data
+from src.extract.extract_data import peak_rss_mb
+from src.helper.intermediate import DataFrameTarget
+from src.transformation.transform_data import (transform_in_chunks, transform_marketing_data,
+                                               transform_sales_data, transform_scraping_data, unwanted_conditions)
+
+DATASETS = {
+    'sales': (generate_sales_data, transform_sales_data),
+    'marketing': (generate_marketing_data, transform_marketing_data),
+    'scraping': (generate_scraping_data, transform_scraping_data),
+}
+
+
+def write_source(dataset, source_path, rows, seed):
+    DataFrameTarget(source_path).write(DATASETS[dataset][0](rows, seed=seed))
+
+
+def run_transform(dataset, source_path, output_path, chunksize, queue):
+    transform = DATASETS[dataset][1]
+    source = DataFrameTarget(source_path)
+    output = DataFrameTarget(output_path)
+    start = time.perf_counter()
+    if chunksize:
+        kwargs = {}
+        if dataset == 'marketing':
+            kwargs['dropped_conditions'] = unwanted_conditions(source.read(columns=['prices.condition'])['prices.condition'])
+        with output.open_writer() as writer:
+            transform_in_chunks(source.iter_chunks(chunksize), transform, writer, **kwargs)
+    else:
+        output.write(transform(source.read()))
+    queue.put((time.perf_counter() - start, peak_rss_mb()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dataset', default='sales', choices=list(DATASETS))
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # A child process inherits the peak RSS of its parent, so the parent never holds the data
+    # until every mode has run
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, 'source')
+        process = context.Process(target=write_source, args=(args.dataset, source_path, args.rows, args.seed))
+        process.start()
+        process.join()
+
+        output_paths = {}
+        for name, chunksize in [('in memory', 0), (f'chunks of {args.chunksize}', args.chunksize)]:
+            output_paths[name] = os.path.join(tmp_dir, f'output_{chunksize}')
+            queue = context.Queue()
+            process = context.Process(target=run_transform,
+                                      args=(args.dataset, source_path, output_paths[name], chunksize, queue))
+            process.start()
+            seconds, rss = queue.get()
+            process.join()
+            print(f'{name:<20} {seconds:7.2f}s  peak RSS {rss:8.1f} MB')
+
+        expected, actual = [DataFrameTarget(path).read() for path in output_paths.values()]
+        pd.testing.assert_frame_equal(expected, actual)
+        print(f'Both modes return the same {len(actual)} rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark suite of the transform and validation functions and of the Luigi stages, on the
+seeded synthetic data of benchmarks.synthetic, over several sizes.
+
+Every function and stage runs in a fresh process, so its peak RSS is measured on its own.
+The results are written as JSON with the commit they were measured on, and two result
+files can be compared to see which functions got faster or slower between commits.
+
+    function  transform_*_data and profile_data of every table, best time of --repeat runs
+    stage     ValidateXData and TransformXData run by Luigi on a synthetic extract partition
+              of --stage-date (removed afterwards, the validation reports are written to a
+              temporary directory), timed by the task events of the pipeline.
+    import    Import time of etl_luigi and of the pipeline modules, see bench_import_time
+
+Run from the project root:
+    python -m benchmarks.bench_suite --rows 10000 100000 1000000
+    python -m benchmarks.bench_suite --rows 10000000 --tables sales marketing --no-stages
+    python -m benchmarks.bench_suite --compare benchmarks/results/1a2b3c4.json benchmarks/results/5d6e7f8.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_import_time import MODULES, measure_import_time
+from benchmarks.synthetic import generate_marketing_data, generate_sales_data, generate_scraping_data
+from src.helper.instrumentation import peak_rss_mb
+from src.transformation.transform_data import transform_marketing_data, transform_sales_data, transform_scraping_data
+from src.validation.validate_data import profile_data
+
+GENERATORS = {
+    'sales': generate_sales_data,
+    'marketing': generate_marketing_data,
+    'scraping': generate_scraping_data,
+}
+TRANSFORMS = {
+    'sales': transform_sales_data,
+    'marketing': transform_marketing_data,
+    'scraping': transform_scraping_data,
+}
+# Luigi tasks of every table: the extract written from the synthetic data, then the stages measured
+STAGE_TASKS = {
+    'sales': ('ExtractSalesData', ['ValidateSalesData', 'TransformSalesData']),
+    'marketing': ('ExtractMarketingData', ['ValidateMarketingData', 'TransformMarketingData']),
+    'scraping': ('ExtractScrapingData', ['ValidateScrapingData', 'TransformScrapingData']),
+}
+RESULTS_DIR = 'benchmarks/results'
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """
+    Commit and versions the results were measured with.
+    """
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_function(name, table, rows, seed, repeat, queue):
+    df = GENERATORS[table](rows, seed=seed)
+    function = TRANSFORMS[table] if name.startswith('transform') else (lambda data: profile_data(data, table))
+    timings = []
+    # The transforms change their input, every run gets its own copy (not timed)
+    for run in range(repeat):
+        data = df.copy()
+        if run == 0:
+            rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(data)
+        timings.append(time.perf_counter() - start)
+        if run == 0:
+            # Peak of the first run only, the copies of the next runs are not part of the function
+            rss_after = peak_rss_mb()
+        del data
+    queue.put({'seconds': min(timings), 'peak_rss_mb': rss_after, 'peak_rss_increase_mb': rss_after - rss_before})
+
+
+def write_extract(table, rows, seed, date):
+    import etl_luigi
+    task = getattr(etl_luigi, STAGE_TASKS[table][0])(date=date)
+    task.output().write(GENERATORS[table](rows, seed=seed))
+
+
+def run_stage(task_family, date, events_path, queue):
+    import luigi
+    import etl_luigi
+
+    # Task events of this stage only, in a file of the benchmark. The validation reports are
+    # cached by content, they are written next to it so every run validates again
+    config = luigi.configuration.get_config()
+    for section in ('metrics', 'validation'):
+        if not config.has_section(section):
+            config.add_section(section)
+    config.set('metrics', 'events_path', events_path)
+    config.set('validation', 'reports_dir', os.path.join(os.path.dirname(events_path), 'validate'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        succeeded = luigi.build([getattr(etl_luigi, task_family)(date=date)], local_scheduler=True,
+                                workers=1, log_level='WARNING')
+    if not succeeded:
+        raise RuntimeError(f'{task_family} failed, see the Luigi log above')
+
+    with open(events_path, encoding='utf-8') as file:
+        events = [json.loads(line) for line in file]
+    event = [event for event in events if event['event'] == 'task' and event['status'] == 'success'
+             and event['task_family'] == task_family][-1]
+    queue.put({'seconds': event['wall_seconds'],
+               'cpu_seconds': event['cpu_seconds'],
+               # Peak of the task, the process peak where it cannot be measured (not Linux)
+               'peak_rss_mb': event['peak_rss_mb'] if event['peak_rss_mb'] is not None else event['process_peak_rss_mb'],
+               'bytes_read': event['bytes_read'],
+               'bytes_written': event['bytes_written']})
+
+
+def _in_process(context, target, *args):
+    # Runs the target in a fresh process and returns what it put in the queue
+    queue = context.Queue()
+    process = context.Process(target=target, args=(*args, queue))
+    process.start()
+    # A process that crashed (e.g. killed out of memory) puts nothing, it is not waited for
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except queue_module.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f'{target.__name__}{args} exited with code {process.exitcode}')
+    process.join()
+    return result
+
+
+def _run(context, target, *args):
+    process = context.Process(target=target, args=args)
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f'{target.__name__}{args} failed')
+
+
+def _result(kind, name, table, rows, measured):
+    result = {'kind': kind, 'name': name, 'table': table, 'rows': rows, **measured}
+    result['rows_per_second'] = rows / result['seconds'] if rows and result['seconds'] else None
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()}
+
+
+def _print_result(result):
+    print(f"{result['kind']:<9} {result['name']:<34} {result['table']:<10} {result['rows']:>10} rows  "
+          f"{result['seconds']:8.3f}s  {result['rows_per_second'] or 0:12,.0f} rows/s  "
+          f"peak RSS {result['peak_rss_mb']:8.1f} MB")
+
+
+def run_suite(args):
+    context = multiprocessing.get_context('spawn')
+    results = []
+    if args.imports:
+        for module in MODULES:
+            results.append(_result('import', module, '-', 0, measure_import_time(module, args.repeat)))
+            _print_result(results[-1])
+
+    for rows in args.rows:
+        for table in args.tables:
+            if table == 'scraping' and rows > args.scraping_max_rows:
+                continue
+            for name in [TRANSFORMS[table].__name__, 'profile_data']:
+                measured = _in_process(context, run_function, name, table, rows, args.seed, args.repeat)
+                results.append(_result('function', name, table, rows, measured))
+                _print_result(results[-1])
+
+            if not args.stages:
+                continue
+            date = args.stage_date
+            partitions = [f'data/{stage}/{date:%Y-%m-%d}' for stage in ('extract', 'transform')]
+            try:
+                _run(context, write_extract, table, rows, args.seed, date)
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    for task_family in STAGE_TASKS[table][1]:
+                        events_path = os.path.join(tmp_dir, f'{task_family}.jsonl')
+                        measured = _in_process(context, run_stage, task_family, date, events_path)
+                        results.append(_result('stage', task_family, table, rows, measured))
+                        _print_result(results[-1])
+            finally:
+                for partition in partitions:
+                    shutil.rmtree(partition, ignore_errors=True)
+    return results
+
+
+def _key(result):
+    return result['kind'], result['name'], result['table'], result['rows']
+
+
+def compare(base_path, head_path, threshold):
+    """
+    Prints the change of time and peak memory of every result measured in both files.
+
+    Returns:
+        list: The results more than `threshold` slower in the second file.
+    """
+    with open(base_path, encoding='utf-8') as file:
+        base = json.load(file)
+    with open(head_path, encoding='utf-8') as file:
+        head = json.load(file)
+    print(f"base {base['environment']['commit']}  head {head['environment']['commit']}")
+
+    base_results = {_key(result): result for result in base['results']}
+    regressions = []
+    for result in head['results']:
+        before = base_results.get(_key(result))
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'SLOWER'
+            regressions.append(result)
+        elif ratio < 1 - threshold:
+            flag = 'faster'
+        print(f"{result['kind']:<9} {result['name']:<34} {result['table']:<10} {result['rows']:>10} rows  "
+              f"{before['seconds']:8.3f}s -> {result['seconds']:8.3f}s  x{ratio:5.2f}  "
+              f"peak RSS {before['peak_rss_mb']:8.1f} -> {result['peak_rss_mb']:8.1f} MB  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--tables', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    # A day of Kompas is a few hundred articles, and a synthetic article is a few KB of text
+    parser.add_argument('--scraping-max-rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--imports', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--stage-date', type=datetime.date.fromisoformat, default=datetime.date(2000, 1, 1))
+    parser.add_argument('--output', help=f'JSON file of the results, {RESULTS_DIR}/<commit>.json by default')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='share of time above which a result counts as slower in --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    env = environment()
+    results = run_suite(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"{(env['commit'] or 'unknown')[:7]}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'environment': env, 'seed': args.seed, 'repeat': args.repeat, 'results': results}, file, indent=2)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
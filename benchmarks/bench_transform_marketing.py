@@ -0,0 +1,116 @@
+"""
+Runtime of the vectorized weight, availability and shipping cleaning of
+transform_marketing_data against the previous row by row functions (kept below as
+the reference), on synthetic marketing data.
+
+Every vectorized column must equal the column of the reference function. This is checked
+first on a few hand-picked values of every column (in well under a second, --check-only
+stops there), then on every synthetic dataset that is timed.
+
+Run from the project root:
+    python -m benchmarks.bench_transform_marketing --check-only
+    python -m benchmarks.bench_transform_marketing --rows 100000 1000000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_marketing_data
+from src.transformation.transform_data import (_normalise_availability, _shipping_cost, _weight_in_pounds,
+                                               transform_marketing_data)
+
+
+def reference_convert_to_pounds(weight_str):
+    try:
+        pounds = 0
+        ounces = 0
+        pounds_match = re.search(r'(\d*\.?\d+)\s?(?:lbs?|pounds?)', weight_str)
+        if pounds_match:
+            pounds = float(pounds_match.group(1))
+        ounces_matches = re.search(r'(\d*\.?\d+)\s?(?:oz|ounces?)', weight_str)
+        if ounces_matches:
+            ounces = float(ounces_matches.group(1))
+        return pounds + (ounces * 1 / 16)
+    except:
+        return np.nan
+
+
+def reference_availability(prices_availability):
+    prices_availability = prices_availability.upper()
+    if prices_availability in ['YES', 'TRUE', 'SPECIAL ORDER', 'IN STOCK', '32 AVAILABLE', '7 AVAILABLE']:
+        return 'YES'
+    elif prices_availability in ['UNDEFINED', 'OUT OF STOCK', 'NO', 'MORE ON THE WAY', 'SOLD', 'FALSE', 'RETIRED']:
+        return 'NO'
+    return prices_availability
+
+
+def reference_shipping(shipping):
+    return shipping.fillna('free').apply(
+        lambda x: 0 if 'USD' not in x else x.replace('USD', '').replace('.', '')
+    ).astype('int')
+
+
+# (column, reference, vectorized)
+CLEANERS = [
+    ('weight', lambda column: column.apply(reference_convert_to_pounds), _weight_in_pounds),
+    ('prices.availability', lambda column: column.apply(reference_availability), _normalise_availability),
+    ('prices.shipping', reference_shipping, _shipping_cost),
+]
+
+
+# Hand-picked values of every column: missing units, values without "USD", mixed case, missing values.
+# The reference availability raises on a missing value, the vectorized one keeps it missing.
+EDGE_CASES = {
+    'weight': ['1.2 pounds', '14 oz', '3 lbs 2 oz', '1 lb', '1 pound', '2 ounces', '1 ounce', '0.5lbs', '.5 pounds',
+               '12', '12 kg', 'lbs', '', '1.2 Pounds', '3 LBS', '2 Oz', '1,200 pounds', '2 lbs 3.5 oz', 'Weight: 4 oz',
+               np.nan, None],
+    'prices.availability': ['Yes', 'yes', 'TRUE', 'true', 'In Stock', 'in stock', 'Special Order', '32 available',
+                            '7 AVAILABLE', 'undefined', 'Out Of Stock', 'no', 'More on the way', 'sold', 'False',
+                            'Retired', 'limited stock', ' yes ', ''],
+    'prices.shipping': ['USD 25.00', 'USD 0.00', 'USD 5', 'USD25.00', ' USD 7.50 ', 'usd 5.00', 'Usd 5.00', '25.00',
+                        '$25.00', 'Free', 'free', 'FREE', 'Value', 'Freight', 'Standard', '', np.nan, None],
+}
+
+
+def check_edge_cases():
+    for column, reference, vectorized in CLEANERS:
+        values = pd.Series(EDGE_CASES[column], dtype=object, name=column)
+        pd.testing.assert_series_equal(reference(values), vectorized(values), check_names=False)
+    print(f'{sum(map(len, EDGE_CASES.values()))} edge cases equivalent')
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check-only', action='store_true', help='only check the edge cases')
+    args = parser.parse_args()
+
+    check_edge_cases()
+    if args.check_only:
+        return
+
+    for rows in args.rows:
+        df = generate_marketing_data(rows, seed=args.seed)
+        print(f'\n{rows} rows')
+        for column, reference, vectorized in CLEANERS:
+            expected, reference_seconds = _timed(reference, df[column])
+            actual, vectorized_seconds = _timed(vectorized, df[column])
+            pd.testing.assert_series_equal(expected, actual, check_names=False)
+            print(f'{column:<20} reference {reference_seconds:6.2f}s  vectorized {vectorized_seconds:6.2f}s  '
+                  f'x{reference_seconds / vectorized_seconds:.1f}')
+        _, seconds = _timed(transform_marketing_data, df)
+        print(f'{"transform (total)":<20} {seconds:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
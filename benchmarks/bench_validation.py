@@ -0,0 +1,69 @@
+"""
+Runtime of the validation engine (one hash per column, HyperLogLog distinct counts on
+large data) against the previous print based checks (kept below as the reference), on
+synthetic sales data.
+
+The duplicate count must equal the one of the reference, and the distinct counts must
+be exact below --exact-distinct-max-rows and within a few percent above it.
+
+Run from the project root:
+    python -m benchmarks.bench_validation --rows 1000000 5000000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.synthetic import generate_sales_data
+from src.validation.validate_data import EXACT_DISTINCT_MAX_ROWS, profile_data
+
+
+def reference_validation(df):
+    # Previous checks: unique() of every column and a full copy of the duplicate rows
+    stats = {'missing': {}, 'distinct': {}}
+    for column in df.columns:
+        stats['missing'][column] = df[column].isnull().sum()
+    stats['duplicates'] = len(df[df.duplicated()])
+    for column in df.columns:
+        unique_values = df[column].unique()
+        stats['distinct'][column] = len(unique_values)
+        if len(unique_values) <= 100:
+            print(unique_values)
+    return stats
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    # The reference prints the unique values, which is not what is measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 5_000_000])
+    parser.add_argument('--exact-distinct-max-rows', type=int, default=EXACT_DISTINCT_MAX_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        df = generate_sales_data(rows, seed=args.seed)
+        expected, reference_seconds = _timed(reference_validation, df)
+        report, seconds = _timed(profile_data, df, 'sales', exact_distinct_max_rows=args.exact_distinct_max_rows)
+        assert report['duplicates'] == expected['duplicates'], (report['duplicates'], expected['duplicates'])
+
+        # unique() counts NaN as a value, the report does not
+        errors = []
+        for column, stats in report['column_stats'].items():
+            distinct = expected['distinct'][column] - (expected['missing'][column] > 0)
+            errors.append(abs(stats['distinct'] - distinct) / max(distinct, 1))
+        if report['distinct_method'] == 'exact':
+            assert max(errors) == 0, errors
+        print(f'{rows:>10} rows  reference {reference_seconds:7.2f}s  engine {seconds:7.2f}s  '
+              f'x{reference_seconds / seconds:.1f}  ({report["distinct_method"]} distinct, '
+              f'max error {max(errors):.2%})')
+
+
+if __name__ == '__main__':
+    main()
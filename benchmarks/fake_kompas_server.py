@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Article page with the same markup the Kompas scraper looks for
+ARTICLE_TEMPLATE = """<html><head><title>{title}</title>
+<script>window.dataLayer = window.dataLayer || []; dataLayer.push({{"page": "{title}"}});</script>
+<style>.read__title {{ font-size: 2em; }}</style></head><body>
+{chrome}
+<ul class="breadcrumb">
+  <li class="breadcrumb__item"><span>Home</span></li>
+  <li class="breadcrumb__item"><span>{topik}</span></li>
+  <li class="breadcrumb__item"><span>{sub_topik}</span></li>
+</ul>
+{topic_subtitle}
+<h1 class="read__title">{title}</h1>
+<div class="read__time">Kompas.com - {published}</div>
+<div class="credit-title-name"><h6>Penulis {page}</h6><h6>Editor {number}</h6></div>
+<div class="read__content">{paragraphs}<!-- ads --><script>loadAds("{title}");</script></div>
+{chrome}
+</body></html>"""
+
+# Navigation, menus and widgets around the article, most of a real page is this boilerplate
+CHROME = ''.join(
+    f'<div class="nav__item"><a href="/section/{i}"><span>Section {i}</span></a>'
+    f'<img src="/img/{i}.png" alt="icon {i}"></div>'
+    for i in range(150)
+)
+
+TOPICS = ['Regional', 'Money', 'Nasional', 'Tekno', 'Bola', 'Global']
+
+
+def render_index(base_url, page, articles_per_page):
+    links = ''.join(
+        f'<div class="article__list"><a class="article-link" href="{base_url}/read/{page}/{number}">Artikel {page}-{number}</a></div>'
+        for number in range(1, articles_per_page + 1)
+    )
+    return f'<html><body>{links}</body></html>'
+
+
+def render_article(page, number, paragraphs=20):
+    rng = random.Random(page * 100_000 + number)
+    topic_subtitle = ''
+    if number % 3 == 0:
+        topic_subtitle = f'<div class="topicSubtitle"><a href="/topik/{page}">Topik pilihan {page}</a></div>'
+    body = ''.join(
+        f'<p>Paragraf {i} artikel {page}-{number} {"lorem ipsum " * rng.randint(5, 30)}</p>'
+        for i in range(paragraphs)
+    )
+    return ARTICLE_TEMPLATE.format(title=f'Artikel {page}-{number}',
+                                   topik=rng.choice(TOPICS),
+                                   sub_topik=f'Sub {rng.randint(1, 5)}',
+                                   topic_subtitle=topic_subtitle,
+                                   published=f'{(page % 28) + 1:02d}/09/2024, {number % 24:02d}:{page % 60:02d} WIB',
+                                   page=page,
+                                   number=number,
+                                   chrome=CHROME,
+                                   paragraphs=body)
+
+
+class FakeKompasServer:
+    """
+    Local HTTP server imitating indeks.kompas.com, used to benchmark the scraper offline.
+
+    Usage:
+        with FakeKompasServer(articles_per_page=15, latency=0.05) as server:
+            extract_scraping_data(pages=5, index_url=server.index_url, cache_dir=None)
+    """
+
+    def __init__(self, articles_per_page=15, latency=0.0, error_rate=0.0, host='127.0.0.1', port=0):
+        self.articles_per_page = articles_per_page
+        self.latency = latency
+        # Share of requests answered with a transient 503, to exercise the retry path
+        self.error_rate = error_rate
+        self.rng = random.Random(0)
+        self.requests_served = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests_served += 1
+                # Simulated network / server latency
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if server.error_rate and server.rng.random() < server.error_rate:
+                    self.send_response(503)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                parsed = urlparse(self.path)
+                if parsed.path.startswith('/read/'):
+                    _, _, page, number = parsed.path.split('/')
+                    body = render_article(int(page), int(number))
+                else:
+                    page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+                    body = render_index(server.base_url, page, server.articles_per_page)
+
+                payload = body.encode('utf-8')
+                etag = '"%x"' % zlib.crc32(payload)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f'http://{host}:{self.httpd.server_address[1]}'
+        self.index_url = self.base_url + '/?site=all&page={page}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
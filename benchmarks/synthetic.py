@@ -0,0 +1,174 @@
+"""
+Seeded generators of synthetic raw data, with the same dirty formats the transforms handle.
+
+    generate_sales_data(rows, seed)      amazon_sales_data: "₹1,299" prices, "4,1" ratings, "1,234" counts
+    generate_marketing_data(rows, seed)  ElectronicsProductsPricingData: "1.2 pounds 3 oz" weights, availability labels
+    generate_scraping_data(rows, seed)   scraping_kompas: "Diperbarui dd/mm/YYYY, HH:MM WIB" timestamps
+
+The same (rows, seed) always gives the same DataFrame, so results can be compared across commits.
+"""
+import numpy as np
+import pandas as pd
+
+SALES_CATEGORIES = {
+    'appliances': ['Kitchen & Home Appliances', 'Heating & Cooling Appliances'],
+    'tv, audio & cameras': ['Televisions', 'Headphones', 'Cameras'],
+    'car & motorbike': ['Car Accessories', 'Car Electronics'],
+    "men's clothing": ['Shirts', 'T-shirts & Polos', 'Jeans'],
+}
+AVAILABILITY = ['Yes', 'In Stock', 'TRUE', 'Special Order', 'yes', 'More on the way', 'sold', 'FALSE',
+                'Retired', 'undefined', 'Out Of Stock', 'No', '32 available', '7 available']
+CONDITIONS = ['New', 'new', 'Used', 'Refurbished', 'New other (see details)']
+MERCHANTS = ['Bestbuy.com', 'Walmart.com', 'bhphotovideo.com', 'ebay.com', 'Amazon.com', 'Newegg.com']
+BRANDS = ['Sony', 'Samsung', 'Apple', 'LG', 'Bose', 'Logitech', 'Canon', 'JBL', 'Yamaha', 'Pioneer']
+TOPICS = {
+    'Regional': ['Jawa Tengah', 'Jawa Timur', 'Sumatera', ''],
+    'Money': ['Ekbis', 'Work Smart', 'Spend Smart', ''],
+    'Nasional': ['Politik', 'Hukum', ''],
+    'Tekno': ['Gadget', 'Internet', ''],
+    'Bola': ['Liga Indonesia', 'Liga Inggris', ''],
+}
+REDAKSI = ['Rachmawati', 'Yohana Artha Uly, Sakina Rakhma Diah Setiawan', 'Dita Angga Rusiana', 'Aryo Putranto Saptohutomo']
+
+
+def _with_missing(rng, values, share):
+    # Replace a share of the values with None (missing in the source)
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def _rupees(amounts):
+    return np.array([f'₹{amount:,}' for amount in amounts], dtype=object)
+
+
+def generate_sales_data(rows, seed=0):
+    """
+    Raw amazon_sales_data rows, as extracted from the sales database.
+    """
+    rng = np.random.default_rng(seed)
+    main_categories = rng.choice(list(SALES_CATEGORIES), rows)
+    sub_categories = np.array([SALES_CATEGORIES[category][i % len(SALES_CATEGORIES[category])]
+                               for i, category in enumerate(main_categories)], dtype=object)
+    product = rng.integers(0, max(1, rows // 3), rows)
+    actual = rng.integers(100, 150_000, rows)
+    discount = (actual * rng.uniform(0.3, 1.0, rows)).astype(int)
+
+    ratings = np.round(rng.uniform(1, 5, rows), 1).astype(str).astype(object)
+    comma = rng.random(rows) < 0.2
+    ratings[comma] = np.char.replace(ratings[comma].astype(str), '.', ',')
+    ratings[rng.random(rows) < 0.03] = 'Get'
+    no_of_ratings = np.array([f'{count:,}' for count in rng.integers(1, 200_000, rows)], dtype=object)
+    no_of_ratings[rng.random(rows) < 0.02] = 'FREE Delivery by Amazon'
+
+    actual_price = _with_missing(rng, _rupees(actual), 0.03)
+    actual_price[rng.random(rows) < 0.01] = ''
+    df = pd.DataFrame({
+        'Unnamed: 0': np.arange(rows),
+        'name': np.array([f'Product {i} {BRANDS[i % len(BRANDS)]}' for i in product], dtype=object),
+        'main_category': main_categories.astype(object),
+        'sub_category': sub_categories,
+        'image': np.array([f'https://m.media-amazon.com/images/I/{i}.jpg' for i in product], dtype=object),
+        'link': np.array([f'https://www.amazon.in/product-{i}/dp/B0{i:08d}' for i in product], dtype=object),
+        'ratings': _with_missing(rng, ratings, 0.1),
+        'no_of_ratings': _with_missing(rng, no_of_ratings, 0.1),
+        'discount_price': _with_missing(rng, _rupees(discount), 0.1),
+        'actual_price': actual_price,
+    })
+    # The source contains exact duplicate rows
+    duplicates = rng.random(rows) < 0.02
+    df.loc[duplicates, 'Unnamed: 0'] = df.loc[duplicates, 'Unnamed: 0'].shift(1, fill_value=0)
+    return df
+
+
+def _weights(rng, rows):
+    pounds = np.round(rng.uniform(0.1, 60, rows), 1)
+    ounces = rng.integers(1, 16, rows)
+    kind = rng.integers(0, 6, rows)
+    formats = [
+        lambda p, o: f'{p} pounds',
+        lambda p, o: f'{p} lbs',
+        lambda p, o: f'{o} oz',
+        lambda p, o: f'{int(p)} pounds {o} oz',
+        lambda p, o: f'{o} ounces',
+        lambda p, o: 'N/A',
+    ]
+    return np.array([formats[k](p, o) for k, p, o in zip(kind, pounds, ounces)], dtype=object)
+
+
+def generate_marketing_data(rows, seed=0):
+    """
+    Raw ElectronicsProductsPricingData rows, as read from the marketing CSV.
+    """
+    rng = np.random.default_rng(seed)
+    product = rng.integers(0, max(1, rows // 4), rows)
+    amount = np.round(rng.uniform(5, 2_000, rows), 2)
+    shipping = rng.choice(['Free Shipping', 'USD 25.00', 'USD 5.99', 'Value', 'Standard', 'Freight'], rows).astype(object)
+    added = pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 4 * 365 * 24 * 3600, rows), unit='s')
+    updated = added + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, rows), unit='s')
+    conditions = rng.choice(CONDITIONS, rows).astype(object)
+    # A few rows with the long free-text conditions the transform drops
+    conditions[rng.random(rows) < 0.002] = 'pre-owned: an item that has been used previously'
+    conditions[rng.random(rows) < 0.002] = 'Manufacturer refurbished, grade A'
+
+    return pd.DataFrame({
+        'Unnamed: 0': np.arange(rows),
+        'id': np.array([f'AV{i:018d}' for i in product], dtype=object),
+        'prices.amountMax': amount,
+        'prices.amountMin': amount,
+        'prices.availability': rng.choice(AVAILABILITY, rows).astype(object),
+        'prices.condition': conditions,
+        'prices.currency': 'USD',
+        'prices.dateSeen': np.array([f'{date:%Y-%m-%dT%H:%M:%SZ}' for date in updated], dtype=object),
+        'prices.isSale': rng.random(rows) < 0.2,
+        'prices.merchant': rng.choice(MERCHANTS, rows).astype(object),
+        'prices.shipping': _with_missing(rng, shipping, 0.3),
+        'prices.sourceURLs': np.array([f'https://www.bestbuy.com/site/{i}.p' for i in product], dtype=object),
+        'asins': np.array([f'B0{i:08d}' for i in product], dtype=object),
+        'brand': rng.choice(BRANDS, rows).astype(object),
+        'categories': 'Electronics,Audio,Speakers',
+        'dateAdded': np.array([f'{date:%Y-%m-%dT%H:%M:%SZ}' for date in added], dtype=object),
+        'dateUpdated': np.array([f'{date:%Y-%m-%dT%H:%M:%SZ}' for date in updated], dtype=object),
+        'ean': _with_missing(rng, np.array([f'{i:013d}' for i in product], dtype=object), 0.8),
+        'imageURLs': np.array([f'https://i.ebayimg.com/images/{i}.jpg' for i in product], dtype=object),
+        'keys': np.array([f'product{i}/b0{i:08d}' for i in product], dtype=object),
+        'manufacturer': _with_missing(rng, rng.choice(BRANDS, rows).astype(object), 0.4),
+        'manufacturerNumber': np.array([f'MN{i:06d}' for i in product], dtype=object),
+        'name': np.array([f'Product {i} Speaker' for i in product], dtype=object),
+        'primaryCategories': 'Electronics',
+        'sourceURLs': np.array([f'https://www.walmart.com/ip/{i}' for i in product], dtype=object),
+        'upc': np.array([f'{i:012d}' for i in product], dtype=object),
+        'weight': _weights(rng, rows),
+        'Unnamed: 26': None,
+    })
+
+
+def generate_scraping_data(rows, seed=0, paragraphs=8):
+    """
+    Raw scraping_kompas rows, as written by the scraper.
+    """
+    rng = np.random.default_rng(seed)
+    topics = rng.choice(list(TOPICS), rows)
+    sub_topics = np.array([TOPICS[topic][i % len(TOPICS[topic])] for i, topic in enumerate(topics)], dtype=object)
+    published = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 300 * 24 * 60, rows), unit='min')
+    updated = rng.random(rows) < 0.2
+    tanggal = np.array([f'{"Diperbarui " if is_updated else ""}{date:%d/%m/%Y, %H:%M} WIB'
+                        for date, is_updated in zip(published, updated)], dtype=object)
+    advertorial = rng.random(rows) < 0.03
+    words = np.array(['KOMPAS.com', 'pemerintah', 'warga', 'kota', 'Jakarta', 'menurut', 'data', 'tahun', 'polisi', 'harga'])
+    isi = np.array([' '.join(rng.choice(words, 40 * paragraphs)) for _ in range(rows)], dtype=object)
+    selected = rng.random(rows) < 0.1
+
+    topik = np.where(advertorial, None, topics.astype(object))
+    return pd.DataFrame({
+        'judul': np.array([f'Berita {i} tentang {topic}' for i, topic in enumerate(topics)], dtype=object),
+        'topik': topik,
+        'sub_topik': np.where(sub_topics == '', None, sub_topics),
+        'topik_pilihan': np.where(selected, 'Topik Pilihan Kompas', None),
+        'tanggal_waktu_publish': tanggal,
+        'redaksi': _with_missing(rng, rng.choice(REDAKSI, rows).astype(object), 0.05),
+        'advetorial': np.where(advertorial, 'Advertorial', None),
+        'isi_berita': isi,
+        'link': np.array([f'https://www.kompas.com/read/2024/{i:07d}/berita-{i}' for i in range(rows)], dtype=object),
+        'topik_pilihan_link': np.where(selected, 'https://www.kompas.com/topik-pilihan/list/1', None),
+    })
@@ -9,8 +9,10 @@ CREATE TABLE IF NOT EXISTS sales(
     no_of_ratings REAL,
     discount_price REAL,
     actual_price REAL,
+    natural_key TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT NOW()
 );
+CREATE UNIQUE INDEX IF NOT EXISTS sales_natural_key_idx ON sales (natural_key);
 CREATE TABLE IF NOT EXISTS marketing(
     id SERIAL PRIMARY KEY,
     product_id TEXT,
@@ -52,4 +54,11 @@ CREATE TABLE IF NOT EXISTS scraping(
     isi_berita TEXT,
     link TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS load_audit(
+    table_name TEXT NOT NULL,
+    batch_hash TEXT NOT NULL,
+    row_count BIGINT,
+    loaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (table_name, batch_hash)
 );
\ No newline at end of file
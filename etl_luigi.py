@@ -1,212 +1,521 @@
+import datetime
+import hashlib
+import json
+import os
 import luigi
-import pandas as pd
-from src.extract.extract_data import extract_marketing_data, extract_sales_data, extract_scraping_data
-from src.validation.validate_data import validation_process
-from src.transformation.transform_data import transform_sales_data, transform_marketing_data, transform_scraping_data
-from src.load.load_data import load_sales_data, load_marketing_data, load_scraping_data
+from luigi.tools.range import RangeDaily
+# Only what scheduling needs is imported here. The extract / validate / transform / load
+# modules (pandas, numpy, bs4, requests, SQLAlchemy) are imported in the task that uses them,
+# so a worker only pays for the modules of the tasks it runs
+from src.helper.watermark_store import WatermarkStore
+from src.helper.intermediate import DataFrameTarget, content_hash
+from src.helper.instrumentation import register_luigi_events, span, write_prometheus_textfile
+from src.validation.thresholds import load_thresholds
+
+
+class sales_watermark(luigi.Config):
+    """
+    Incremental extract of amazon_sales_data. When enabled, only the rows beyond the
+    committed high-watermark of `column` are extracted, transformed and loaded.
+    Works with the streaming and the in-memory extract (ExtractSalesData chunksize). The
+    watermark is shared by every day, it is not meant for backfills.
+    Set with --sales-watermark-enabled or a [sales_watermark] section in luigi.cfg.
+    """
+    enabled = luigi.BoolParameter(default=False)
+    column = luigi.Parameter(default="Unnamed: 0")
+    state_path = luigi.Parameter(default="data/state/watermarks.json")
         
+class pipeline(luigi.Config):
+    """
+    Number of Luigi workers of the pipeline, the tasks of the three datasets run in parallel.
+    Set with a [pipeline] section in luigi.cfg.
+    """
+    workers = luigi.IntParameter(default=3)
+
+class metrics(luigi.Config):
+    """
+    Timing and memory instrumentation. Every task event and every extract / transform /
+    validate / load span is appended as a JSON line to `events_path` (empty to disable), and
+    the metrics of the run are written to the Prometheus textfile `prometheus_path` when set.
+    Set with a [metrics] section in luigi.cfg.
+    """
+    events_path = luigi.Parameter(default="log/metrics.jsonl")
+    prometheus_path = luigi.OptionalParameter(default=None)
+
+register_luigi_events(events_path=lambda: metrics().events_path or None)
+
+class dtype_plan(luigi.Config):
+    """
+    Compact dtypes (categories, Arrow strings, float32 for REAL columns, small integers)
+    planned from data_warehouse/init.sql for the DataFrames written by the Transform tasks.
+    The streaming transform (chunksize > 0) plans on its first chunk, see ChunkDtypePlan.
+    Set with --dtype-plan-enabled or a [dtype_plan] section in luigi.cfg.
+    """
+    enabled = luigi.BoolParameter(default=True, parsing=luigi.BoolParameter.EXPLICIT_PARSING)
+    category_max_ratio = luigi.FloatParameter(default=0.5)
+
+
+def compact(df, table):
+    # Converts to the dtypes of the plan and prints the memory saved per column
+    from src.helper.dtype_planner import compact_dtypes, format_memory_report
+
+    config = dtype_plan()
+    if not config.enabled:
+        return df
+    df, report = compact_dtypes(df, table, category_max_ratio=config.category_max_ratio)
+    print(format_memory_report(report, table))
+    return df
+
+
+def chunk_dtype_plan(table):
+    # Dtype plan of the streaming transform (chunksize > 0), applied to every chunk
+    from src.helper.dtype_planner import ChunkDtypePlan
+
+    config = dtype_plan()
+    if not config.enabled:
+        return None
+    return ChunkDtypePlan(table, category_max_ratio=config.category_max_ratio)
+
 class ExtractSalesData(luigi.Task):
+    # Day of the batch, every day is written to its own partition
+    date = luigi.DateParameter(default=datetime.date.today())
+    # Rows per chunk of the streaming extract, 0 loads the whole table in memory at once
+    chunksize = luigi.IntParameter(default=100_000)
+    # Number of key (or ctid) ranges of amazon_sales_data read concurrently
+    partitions = luigi.IntParameter(default=1)
+    partition_column = luigi.OptionalParameter(default=None)
 
     def requires(self):
         pass
 
     def output(self):
-        return luigi.LocalTarget("data/extract/extract_sales_data.csv")
+        return DataFrameTarget(f"data/extract/{self.date:%Y-%m-%d}/extract_sales_data")
+
+    def parts_dir(self):
+        # Per-partition part files, kept next to the output for tasks that read them in parallel
+        return f"data/extract/{self.date:%Y-%m-%d}/extract_sales_data_parts"
                 
     
     def run(self):
-        extract_sales_data().to_csv(self.output().path,index=False)
+        from src.extract.extract_data import (concat_part_files, extract_sales_data, extract_sales_data_partitioned,
+                                              sales_watermark_of, stream_sales_data)
+
+        watermark = sales_watermark()
+        store = WatermarkStore(watermark.state_path)
+        column = watermark.column if watermark.enabled else None
+        since = store.get("amazon_sales_data", column) if watermark.enabled else None
+
+        if self.chunksize > 0:
+            # Chunks are written as they arrive, the target is only moved in place on success
+            if self.partitions > 1:
+                report = extract_sales_data_partitioned(self.parts_dir(),
+                                                        partitions=self.partitions,
+                                                        partition_column=self.partition_column,
+                                                        chunksize=self.chunksize,
+                                                        watermark_column=column,
+                                                        since=since)
+                with self.output().open_writer() as writer:
+                    concat_part_files(report['parts'], writer)
+            else:
+                with self.output().open_writer() as writer:
+                    report = stream_sales_data(writer, chunksize=self.chunksize,
+                                               watermark_column=column, since=since)
+            new_watermark = report['watermark']
+        else:
+            sales_df = extract_sales_data(watermark_column=column, since=since)
+            self.output().write(sales_df)
+            new_watermark = sales_watermark_of(sales_df, column, since) if watermark.enabled else None
+
+        # The new watermark is only committed by LoadData, once the delta is in the DWH
+        if watermark.enabled and new_watermark is not None:
+            store.set_pending("amazon_sales_data", column, new_watermark)
 
 class ExtractMarketingData(luigi.Task):
+    date = luigi.DateParameter(default=datetime.date.today())
 
     def requires(self):
         pass
 
     def output(self):
-        return luigi.LocalTarget("data/extract/extract_marketing_data.csv")
+        return DataFrameTarget(f"data/extract/{self.date:%Y-%m-%d}/extract_marketing_data")
                 
     
     def run(self):
-        extract_marketing_data().to_csv(self.output().path,index=False)
+        from src.extract.extract_data import extract_marketing_data
+
+        self.output().write(extract_marketing_data())
 
 class ExtractScrapingData(luigi.Task):
+    date = luigi.DateParameter(default=datetime.date.today())
+    # Section and index pages of the Kompas index of `date`
+    site = luigi.Parameter(default="all")
+    start_page = luigi.IntParameter(default=1)
+    pages = luigi.IntParameter(default=1)
+    concurrency = luigi.IntParameter(default=4)
+    rate_limit = luigi.FloatParameter(default=2.0)
+    incremental = luigi.BoolParameter(default=True, parsing=luigi.BoolParameter.EXPLICIT_PARSING)
+    parser_backend = luigi.ChoiceParameter(default="strainer", choices=["html.parser", "strainer", "lxml"])
+    parse_workers = luigi.IntParameter(default=0)
+    cache_dir = luigi.Parameter(default="data_source/scraping_data/html_cache")
+    # Rebuild the output from the raw HTML cache only, without scraping
+    replay = luigi.BoolParameter(default=False)
+    # The seen links and the monthly archive are shared by the days, one scrape runs at a time
+    resources = {"kompas_scraping": 1}
 
     def requires(self):
         pass
 
     def output(self):
-        return luigi.LocalTarget("data/extract/extract_scraping_data.csv")
+        return DataFrameTarget(f"data/extract/{self.date:%Y-%m-%d}/extract_scraping_data")
                 
     
     def run(self):
-        extract_scraping_data(pages=1).to_csv(self.output().path,index=False)
-
-class ValidateData(luigi.Task):
+        import pandas as pd
+        from src.extract.extract_data import (SCRAPING_FIELDNAMES, archive_scraped_articles, replay_scraping_data,
+                                              stream_scraping_data)
+
+        if self.replay:
+            self.output().write(replay_scraping_data(date=self.date,
+                                                     cache_dir=self.cache_dir,
+                                                     parser_backend=self.parser_backend,
+                                                     parse_workers=self.parse_workers))
+            return
+
+        # Only the articles of this run are written, batch by batch, the archive is not read back
+        with self.output().open_writer() as writer, \
+                span("extract", table="scraping", function="stream_scraping_data") as record:
+            articles = 0
+            for batch in stream_scraping_data(pages=self.pages,
+                                              start_page=self.start_page,
+                                              site=self.site,
+                                              date=self.date,
+                                              concurrency=self.concurrency,
+                                              rate_limit=self.rate_limit,
+                                              incremental=self.incremental,
+                                              parser_backend=self.parser_backend,
+                                              parse_workers=self.parse_workers,
+                                              cache_dir=self.cache_dir):
+                writer.write(batch)
+                articles += len(batch)
+            if articles == 0:
+                # Nothing new today, the output still has the columns of the scraping data
+                writer.write(pd.DataFrame(columns=SCRAPING_FIELDNAMES, dtype=object))
+            record["rows_out"] = articles
+
+        # The output is in place: only now the articles are archived and their links skipped by the next runs
+        archive_scraped_articles(self.output().iter_chunks(), date=self.date, mark_seen=self.incremental)
+
+class validation(luigi.Config):
+    """
+    Validation of the extracted data. Every table is checked against its thresholds in
+    `thresholds_path`, and ValidateData fails when one is broken and `fail_on_violation` is set.
+    Set with --validation-sample-size or a [validation] section in luigi.cfg.
+    """
+    thresholds_path = luigi.Parameter(default="src/validation/thresholds.json")
+    fail_on_violation = luigi.BoolParameter(default=True, parsing=luigi.BoolParameter.EXPLICIT_PARSING)
+    # Distinct values kept per column in the report
+    sample_size = luigi.IntParameter(default=20)
+    # Above this many rows, distinct values are counted with HyperLogLog
+    exact_distinct_max_rows = luigi.IntParameter(default=1_000_000)
+    # Reports kept per table, each one caches the validation of one extract
+    keep_reports = luigi.IntParameter(default=10)
+    # Directory of the reports, shared by the days: an extract with the same content on another
+    # day (e.g. the undated marketing CSV) reuses the report
+    reports_dir = luigi.Parameter(default="data/validate")
+
+class ValidateDataset(luigi.Task):
+    """
+    Validates the extract of one dataset against the thresholds of its table. The report is
+    keyed on the content of the extract and the validation settings only, not on the date, so
+    an unchanged extract is not validated again. Subclasses set `table_name` and require their extract.
+    """
+    date = luigi.DateParameter(default=datetime.date.today())
+    table_name = None
+
+    def report_key(self):
+        # None while the extract does not exist yet
+        data_hash = content_hash(self.input().path)
+        if data_hash is None:
+            return None
+        config = validation()
+        settings = json.dumps([load_thresholds(config.thresholds_path).get(self.table_name),
+                               config.sample_size, config.exact_distinct_max_rows], sort_keys=True)
+        return hashlib.sha256((data_hash + settings).encode()).hexdigest()[:16]
 
-    def requires(self):
-        return [ExtractSalesData(),
-                ExtractMarketingData(),
-                ExtractScrapingData()]
-    
     def output(self):
-        pass
+        key = self.report_key() or "pending"
+        return luigi.LocalTarget(os.path.join(validation().reports_dir, f"{self.table_name}_{key}.json"))
 
     def run(self):
-        # read sales data
-        validate_sales_data = pd.read_csv(self.input()[0].path)
+        from src.validation.validate_data import ValidationError, validation_process
+
+        config = validation()
+        report = validation_process(df = self.input().read(),
+                                    table_name = self.table_name,
+                                    thresholds = load_thresholds(config.thresholds_path).get(self.table_name),
+                                    sample_size = config.sample_size,
+                                    exact_distinct_max_rows = config.exact_distinct_max_rows)
+
+        if report["violations"] and config.fail_on_violation:
+            # The report of a failed run is kept aside, so the task runs again next time
+            failed_path = self.output().path.replace(".json", ".failed.json")
+            with luigi.LocalTarget(failed_path).open("w") as file:
+                json.dump(report, file, indent=2, default=str)
+            raise ValidationError(f"{len(report['violations'])} validation thresholds of `{self.table_name}` "
+                                  f"broken, see {failed_path}:\n" + "\n".join(report["violations"]))
+
+        with self.output().open("w") as file:
+            json.dump(report, file, indent=2, default=str)
+        self.remove_old_reports()
+
+    def remove_old_reports(self):
+        # Only the latest reports of the table are kept as a cache. The reports of failed runs
+        # (.failed.json) are not a cache, they are neither counted nor removed.
+        directory = os.path.dirname(self.output().path)
+        reports = [os.path.join(directory, name) for name in os.listdir(directory)
+                   if name.startswith(f"{self.table_name}_") and name.endswith(".json")
+                   and not name.endswith(".failed.json")]
+        reports.sort(key=os.path.getmtime, reverse=True)
+        for path in reports[validation().keep_reports:]:
+            os.remove(path)
+
+class ValidateSalesData(ValidateDataset):
+    table_name = "sales"
 
-        # read marketing data
-        validate_marketing_data = pd.read_csv(self.input()[1].path)
+    def requires(self):
+        return ExtractSalesData(date=self.date)
 
-        # read journal data
-        validate_scraping_data = pd.read_csv(self.input()[2].path)
+class ValidateMarketingData(ValidateDataset):
+    table_name = "marketing"
 
-        # validate data
-        validation_process(df = validate_sales_data,
-                           table_name = "sales")
-        
-        validation_process(df = validate_marketing_data,
-                           table_name = "marketing")
-        
-        validation_process(df = validate_scraping_data,
-                           table_name = "scraping")
+    def requires(self):
+        return ExtractMarketingData(date=self.date)
+
+class ValidateScrapingData(ValidateDataset):
+    table_name = "scraping"
+
+    def requires(self):
+        return ExtractScrapingData(date=self.date)
+
+class ValidateData(luigi.WrapperTask):
+    # The three datasets validate as separate tasks, in parallel with more than one worker
+    date = luigi.DateParameter(default=datetime.date.today())
+
+    def requires(self):
+        return [ValidateSalesData(date=self.date),
+                ValidateMarketingData(date=self.date),
+                ValidateScrapingData(date=self.date)]
 
 class TransformSalesData(luigi.Task):
+    date = luigi.DateParameter(default=datetime.date.today())
+    # Rows per chunk of the streaming transform, 0 transforms the whole dataset in memory
+    chunksize = luigi.IntParameter(default=0)
 
     def requires(self):
-        return ExtractSalesData()
+        # The extract is only transformed once it passed its validation
+        return [ExtractSalesData(date=self.date), ValidateSalesData(date=self.date)]
     
     def output(self):
-        return luigi.LocalTarget("data/transform/transform_sales_data.csv")
+        return DataFrameTarget(f"data/transform/{self.date:%Y-%m-%d}/transform_sales_data")
     
     def run(self):
+        from src.transformation.transform_data import transform_in_chunks, transform_sales_data
+
+        if self.chunksize > 0:
+            with self.output().open_writer() as writer:
+                transform_in_chunks(self.input()[0].iter_chunks(self.chunksize), transform_sales_data, writer,
+                                    dtype_plan=chunk_dtype_plan("sales"))
+            return
+
         # read data from previous source
-        sales_df = pd.read_csv(self.input().path)
+        sales_df = self.input()[0].read()
         
         #Transform the data
         sales_df = transform_sales_data(sales_df)
 
-        # save the output to csv
-        sales_df.to_csv(self.output().path, index = False)
+        # save the output
+        self.output().write(compact(sales_df, "sales"))
 
 class TransformMarketingData(luigi.Task):
+    date = luigi.DateParameter(default=datetime.date.today())
+    # Rows per chunk of the streaming transform, 0 transforms the whole dataset in memory
+    chunksize = luigi.IntParameter(default=0)
 
     def requires(self):
-        return ExtractMarketingData()
+        # The extract is only transformed once it passed its validation
+        return [ExtractMarketingData(date=self.date), ValidateMarketingData(date=self.date)]
     
     def output(self):
-        return luigi.LocalTarget("data/transform/transform_marketing_data.csv")
+        return DataFrameTarget(f"data/transform/{self.date:%Y-%m-%d}/transform_marketing_data")
     
     def run(self):
+        from src.transformation.transform_data import transform_in_chunks, transform_marketing_data, unwanted_conditions
+
+        if self.chunksize > 0:
+            # The dropped conditions depend on the whole dataset, only that column is read up front
+            dropped_conditions = unwanted_conditions(self.input()[0].read(columns=["prices.condition"])["prices.condition"])
+            with self.output().open_writer() as writer:
+                transform_in_chunks(self.input()[0].iter_chunks(self.chunksize), transform_marketing_data, writer,
+                                    dtype_plan=chunk_dtype_plan("marketing"),
+                                    dropped_conditions=dropped_conditions)
+            return
+
         # read data from previous source
-        marketing_df = pd.read_csv(self.input().path)
+        marketing_df = self.input()[0].read()
         
         #Transform the data
         marketing_df = transform_marketing_data(marketing_df)
 
-        # save the output to csv
-        marketing_df.to_csv(self.output().path, index = False)
+        # save the output
+        self.output().write(compact(marketing_df, "marketing"))
 
 class TransformScrapingData(luigi.Task):
+    date = luigi.DateParameter(default=datetime.date.today())
+    # Rows per chunk of the streaming transform, 0 transforms the whole dataset in memory
+    chunksize = luigi.IntParameter(default=0)
 
     def requires(self):
-        return ExtractScrapingData()
+        # The extract is only transformed once it passed its validation
+        return [ExtractScrapingData(date=self.date), ValidateScrapingData(date=self.date)]
     
     def output(self):
-        return luigi.LocalTarget("data/transform/transform_scraping_data.csv")
+        return DataFrameTarget(f"data/transform/{self.date:%Y-%m-%d}/transform_scraping_data")
     
     def run(self):
+        from src.transformation.transform_data import transform_in_chunks, transform_scraping_data
+
+        if self.chunksize > 0:
+            with self.output().open_writer() as writer:
+                transform_in_chunks(self.input()[0].iter_chunks(self.chunksize), transform_scraping_data, writer,
+                                    dtype_plan=chunk_dtype_plan("scraping"))
+            return
+
         # read data from previous source
-        scraping_df = pd.read_csv(self.input().path)
+        scraping_df = self.input()[0].read()
         
         #Transform the data
         scraping_df = transform_scraping_data(scraping_df)
 
-        # save the output to csv
-        scraping_df.to_csv(self.output().path, index = False)
+        # save the output
+        self.output().write(compact(scraping_df, "scraping"))
         
 
-# class LoadSalesData(luigi.Task):
+class LoadDataset(luigi.Task):
+    """
+    Loads the transformed data of one dataset into its DWH table. The load is complete once
+    the load audit table has a row for the hash of the transformed data, written in the
+    transaction of the load. Subclasses set `table_name`, require their transform and
+    implement `load(df, batch_hash)`.
+    """
+    date = luigi.DateParameter(default=datetime.date.today())
+    table_name = None
 
-#     def requires(self):
-#         return TransformSalesData()
-    
-#     def output(self):
-#         return luigi.LocalTarget("data/load/load_sales_data.csv")
-    
-#     def run(self):
-#         # read data from previous task
-#         sales_df_transformed = pd.read_csv(self.input().path)
+    def batch_hash(self):
+        # None while the transform output does not exist yet
+        return content_hash(self.input().path)
 
-#         # read data from previous task Load the data to the DWH
-#         load_sales_data(pd.read_csv(self.input().path))
+    def output(self):
+        from src.load.load_audit import LoadAuditTarget
 
-#         # save the output
-#         sales_df_transformed.to_csv(self.output().path, index = False)
-        
+        return LoadAuditTarget(self.table_name, self.batch_hash())
 
-# class LoadMarketingData(luigi.Task):
+    def run(self):
+        # read data from previous task and load it to the DWH
+        self.load(self.input().read(), self.batch_hash())
 
-#     def requires(self):
-#         return TransformMarketingData()
-    
-#     def output(self):
-#         return luigi.LocalTarget("data/load/load_marketing_data.csv")
-    
-#     def run(self):
-#         # read data from previous task
-#         marketing_df_transformed = pd.read_csv(self.input().path)
+class LoadSalesData(LoadDataset):
+    table_name = "sales"
 
-#         # Load the data to the DWH
-#         load_marketing_data(marketing_df_transformed)
+    def requires(self):
+        return TransformSalesData(date=self.date)
+
+    def load(self, df, batch_hash):
+        from src.load.load_data import load_sales_data
 
-#         # save the output
-#         marketing_df_transformed.to_csv(self.output().path, index = False)
+        # An incremental extract only carries the delta, its watermark is committed once loaded
+        load_sales_data(df, batch_hash = batch_hash)
+        watermark = sales_watermark()
+        if watermark.enabled:
+            WatermarkStore(watermark.state_path).commit("amazon_sales_data")
 
-class LoadData(luigi.Task):
+class LoadMarketingData(LoadDataset):
+    # How the DataFrame is written to the DWH: row by row INSERT, multi-row INSERT or COPY
+    load_method = luigi.ChoiceParameter(default="copy", choices=["insert", "multi", "copy"])
+    table_name = "marketing"
 
     def requires(self):
-        return [TransformSalesData(),
-                TransformMarketingData(),
-                TransformScrapingData()]
-    
-    def output(self):
-        return [luigi.LocalTarget("data/load/load_sales_data.csv"),
-                luigi.LocalTarget("data/load/load_marketing_data.csv"),   
-                luigi.LocalTarget("data/load/load_scraping_data.csv")
-                ]
-    
-    def run(self):
-        # read data from previous task
-        sales_df_transformed = pd.read_csv(self.input()[0].path)
-        marketing_df_transformed = pd.read_csv(self.input()[1].path)
-        scraping_df_transformed = pd.read_csv(self.input()[2].path)
+        return TransformMarketingData(date=self.date)
 
-        # Load the data to the DWH
-        load_sales_data(sales_df_transformed)
-        load_marketing_data(marketing_df_transformed)
-        load_scraping_data(scraping_df_transformed)
+    def load(self, df, batch_hash):
+        from src.load.load_data import load_marketing_data
 
-        # save the output
-        sales_df_transformed.to_csv(self.output()[0].path, index = False)
-        marketing_df_transformed.to_csv(self.output()[1].path, index = False)
-        scraping_df_transformed.to_csv(self.output()[2].path, index = False)
+        load_marketing_data(df, method = self.load_method, batch_hash = batch_hash)
+
+class LoadScrapingData(LoadDataset):
+    # How the DataFrame is written to the DWH: row by row INSERT, multi-row INSERT or COPY
+    load_method = luigi.ChoiceParameter(default="copy", choices=["insert", "multi", "copy"])
+    table_name = "scraping"
+
+    def requires(self):
+        return TransformScrapingData(date=self.date)
+
+    def load(self, df, batch_hash):
+        from src.load.load_data import load_scraping_data
+
+        load_scraping_data(df, method = self.load_method, batch_hash = batch_hash)
+
+class LoadData(luigi.WrapperTask):
+    # The three datasets load as separate tasks, in parallel with more than one worker
+    date = luigi.DateParameter(default=datetime.date.today())
+    load_method = luigi.ChoiceParameter(default="copy", choices=["insert", "multi", "copy"])
+
+    def requires(self):
+        return [LoadSalesData(date=self.date),
+                LoadMarketingData(date=self.date, load_method=self.load_method),
+                LoadScrapingData(date=self.date, load_method=self.load_method)]
+
+class Pipeline(luigi.WrapperTask):
+    """
+    Validates and loads the batch of one day. A range of days is backfilled in parallel with
+    Backfill (luigi's RangeDaily over Pipeline), e.g.:
+
+        python -m luigi --module etl_luigi Backfill --start 2024-09-01 --stop 2024-09-08 --workers 8
+
+    The sources without history (the sales table and the marketing CSV) are extracted as
+    they are when the day runs, only the scraping reads the Kompas index of that day.
+    """
+    date = luigi.DateParameter(default=datetime.date.today())
+
+    def requires(self):
+        return [ValidateData(date=self.date),
+                LoadData(date=self.date)]
+
+    @classmethod
+    def bulk_complete(cls, parameter_tuples):
+        # Used by RangeDaily, the loads are marked in the DWH so there is no path to list
+        return [date for date in parameter_tuples if cls(date=date).complete()]
+
+class Backfill(luigi.WrapperTask):
+    # Runs the Pipeline of every missing day from `start` to `stop` (excluded)
+    start = luigi.DateParameter()
+    stop = luigi.DateParameter(default=datetime.date.today())
+
+    def requires(self):
+        return RangeDaily(of=Pipeline,
+                          start=self.start,
+                          stop=self.stop,
+                          days_back=(datetime.date.today() - self.start).days + 1,
+                          task_limit=(self.stop - self.start).days + 1)
 
 if __name__ == "__main__":
     
     luigi.build(
                 [
-                    ExtractSalesData(),
-                    TransformSalesData(),
-                    # LoadSalesData(),
-                    ExtractMarketingData(),
-                    TransformMarketingData(),
-                    # LoadMarketingData(),
-                    ExtractScrapingData(),
-                    TransformScrapingData(),
-                    ValidateData(),
-                    LoadData()
-                    # LoadScrapingData(),
-
-                ]
-                )
\ No newline at end of file
+                    Pipeline()
+                ],
+                workers = pipeline().workers
+                )
+
+    # Metrics of the whole run, from the events of every worker
+    if metrics().events_path and metrics().prometheus_path:
+        write_prometheus_textfile(metrics().events_path, metrics().prometheus_path)
@@ -0,0 +1,171 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional, only needed by the 'lxml' backend
+    lxml = None
+
+# Classes of the nodes the article fields are taken from
+ARTICLE_CLASSES = ['kcm__header__advertorial', 'breadcrumb__item', 'topicSubtitle', 'read__title',
+                   'read__time', 'credit-title-name', 'read__content']
+
+# Only these nodes (and their children) are built into the tree by the 'strainer' backend
+ARTICLE_STRAINER = SoupStrainer(class_=ARTICLE_CLASSES)
+INDEX_STRAINER = SoupStrainer('a', class_='article-link')
+
+PARSER_BACKENDS = ['html.parser', 'strainer', 'lxml']
+
+
+def _fields_from_soup(response_news):
+    """
+    Extracts the article fields from a BeautifulSoup tree, every node is looked up once.
+    """
+    # Scrape advertorial information
+    advetorial = response_news.find('div', class_='kcm__header__advertorial')
+    advetorial = advetorial.get_text() if advetorial else ''
+
+    # Scrape breadcrumb topics
+    topic_tags = response_news.find_all('li', class_='breadcrumb__item')
+    topics = [tag.find('span').get_text() for tag in topic_tags]
+    topik = topics[1] if len(topics) > 1 else ''
+    sub_topik = topics[2] if len(topics) > 2 else ''
+
+    # Scrape optional topic link
+    topik_pilihan = ''
+    topik_pilihan_link = ''
+    topic_subtitle = response_news.find('div', class_='topicSubtitle')
+    if topic_subtitle:
+        topic_link = topic_subtitle.find('a')
+        topik_pilihan = topic_link.get_text()
+        topik_pilihan_link = topic_link.get('href')
+
+    # Scrape article title
+    judul = response_news.find('h1', class_='read__title')
+    judul = judul.get_text() if judul else ''
+
+    # Scrape publication date and time
+    tanggal_waktu_publish = response_news.find('div', class_='read__time')
+    tanggal_waktu_publish = tanggal_waktu_publish.get_text().split(' - ')[1] if tanggal_waktu_publish else ''
+
+    # Scrape author or editor names
+    redaksi_tag = response_news.find('div', class_='credit-title-name')
+    redaksi = ' '.join([penulis.get_text() for penulis in redaksi_tag.find_all('h6')]) if redaksi_tag else ''
+
+    # Scrape article content
+    konteks_tag = response_news.find('div', class_='read__content')
+    isi_berita = ' '.join([konteks.get_text() for konteks in konteks_tag.find_all('p')]) if konteks_tag else ''
+
+    return {
+        'judul': judul,
+        'topik': topik,
+        'sub_topik': sub_topik,
+        'topik_pilihan': topik_pilihan,
+        'tanggal_waktu_publish': tanggal_waktu_publish,
+        'redaksi': redaksi,
+        'advetorial': advetorial,
+        'isi_berita': isi_berita,
+        'topik_pilihan_link': topik_pilihan_link
+    }
+
+
+def _xpath_class(tag, class_name):
+    # Same matching rule as BeautifulSoup `class_`: the class is one of the space separated classes
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+def _lxml_text(node):
+    # Text of the node like BeautifulSoup get_text(), which leaves out scripts, styles and comments
+    return ''.join(node.xpath('.//text()[not(ancestor::script) and not(ancestor::style)]'))
+
+
+def _first(root, tag, class_name):
+    nodes = root.xpath(_xpath_class(tag, class_name))
+    return nodes[0] if nodes else None
+
+
+def _fields_from_lxml(html):
+    """
+    Extracts the article fields with lxml and XPath, without building a BeautifulSoup tree.
+    """
+    root = lxml.html.fromstring(html)
+
+    advetorial = _first(root, 'div', 'kcm__header__advertorial')
+    advetorial = _lxml_text(advetorial) if advetorial is not None else ''
+
+    topics = [_lxml_text(tag.xpath('.//span')[0]) for tag in root.xpath(_xpath_class('li', 'breadcrumb__item'))]
+    topik = topics[1] if len(topics) > 1 else ''
+    sub_topik = topics[2] if len(topics) > 2 else ''
+
+    topik_pilihan = ''
+    topik_pilihan_link = ''
+    topic_subtitle = _first(root, 'div', 'topicSubtitle')
+    if topic_subtitle is not None:
+        topic_link = topic_subtitle.xpath('.//a')[0]
+        topik_pilihan = _lxml_text(topic_link)
+        topik_pilihan_link = topic_link.get('href')
+
+    judul = _first(root, 'h1', 'read__title')
+    judul = _lxml_text(judul) if judul is not None else ''
+
+    tanggal_waktu_publish = _first(root, 'div', 'read__time')
+    tanggal_waktu_publish = _lxml_text(tanggal_waktu_publish).split(' - ')[1] if tanggal_waktu_publish is not None else ''
+
+    redaksi_tag = _first(root, 'div', 'credit-title-name')
+    redaksi = ' '.join([_lxml_text(penulis) for penulis in redaksi_tag.xpath('.//h6')]) if redaksi_tag is not None else ''
+
+    konteks_tag = _first(root, 'div', 'read__content')
+    isi_berita = ' '.join([_lxml_text(konteks) for konteks in konteks_tag.xpath('.//p')]) if konteks_tag is not None else ''
+
+    return {
+        'judul': judul,
+        'topik': topik,
+        'sub_topik': sub_topik,
+        'topik_pilihan': topik_pilihan,
+        'tanggal_waktu_publish': tanggal_waktu_publish,
+        'redaksi': redaksi,
+        'advetorial': advetorial,
+        'isi_berita': isi_berita,
+        'topik_pilihan_link': topik_pilihan_link
+    }
+
+
+def parse_article(html, backend='strainer'):
+    """
+    Extracts the article fields from a Kompas article page.
+
+    Args:
+        html (str): Raw HTML of the article page.
+        backend (str): Parser backend:
+            - 'html.parser': full BeautifulSoup tree (reference implementation).
+            - 'strainer': BeautifulSoup restricted with a SoupStrainer to the nodes that are used.
+            - 'lxml': lxml with XPath lookups (requires lxml).
+
+    Returns:
+        dict: Scraped fields of the article (without the link).
+    """
+    if backend == 'html.parser':
+        return _fields_from_soup(BeautifulSoup(html, 'html.parser'))
+    if backend == 'strainer':
+        return _fields_from_soup(BeautifulSoup(html, 'html.parser', parse_only=ARTICLE_STRAINER))
+    if backend == 'lxml':
+        if lxml is None:
+            raise ImportError("The 'lxml' parser backend requires the lxml package")
+        return _fields_from_lxml(html)
+    raise ValueError(f"Unknown parser backend '{backend}', choose one of {PARSER_BACKENDS}")
+
+
+def parse_index(html, backend='strainer'):
+    """
+    Returns the article links listed on a Kompas index page.
+    """
+    if backend == 'lxml':
+        if lxml is None:
+            raise ImportError("The 'lxml' parser backend requires the lxml package")
+        return [link.get('href') for link in lxml.html.fromstring(html).xpath(_xpath_class('a', 'article-link'))]
+    if backend == 'strainer':
+        soup = BeautifulSoup(html, 'html.parser', parse_only=INDEX_STRAINER)
+    elif backend == 'html.parser':
+        soup = BeautifulSoup(html, 'html.parser')
+    else:
+        raise ValueError(f"Unknown parser backend '{backend}', choose one of {PARSER_BACKENDS}")
+    return [link.get('href') for link in soup.find_all('a', class_='article-link')]
@@ -1,43 +1,301 @@
 import sys
 import os
+import datetime
+import glob
 import pandas as pd
 import numpy as np
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
 import logging
 import csv
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 from tqdm import tqdm
+from sqlalchemy import text
 # Menambahkan folder project ke sys.path
 from src.helper.db_connector import postgres_engine_sales_data
+from src.helper.html_cache import HtmlCache
+from src.helper.http_client import ScrapingClient
+from src.helper.intermediate import DataFrameTarget
+from src.helper.instrumentation import peak_rss_mb, traced
+from src.extract.article_parser import parse_article, parse_index
+from src.extract.scraping_engine import crawl, start_parse_pool
+from src.extract.seen_index import SeenLinkIndex
 
-def extract_sales_data():
+@traced("extract", table="sales")
+def extract_sales_data(table="amazon_sales_data", watermark_column=None, since=None):
     """
     Extracts sales data from a PostgreSQL database and loads it into a DataFrame.
 
+    Args:
+        table (str): Table of the sales data.
+        watermark_column (str): Column of the incremental extract, None extracts the whole table.
+        since: Only rows with `watermark_column` greater than this value are extracted.
+
     Returns:
         pd.DataFrame: DataFrame containing sales data.
     """
     # Initialize the PostgreSQL engine
     engine = postgres_engine_sales_data()
 
-    query = "SELECT * FROM amazon_sales_data;"
+    quote = engine.dialect.identifier_preparer.quote
+    query = f"SELECT * FROM {quote(table)}"
+    params = {}
+    if watermark_column is not None and since is not None:
+        query += f" WHERE {quote(watermark_column)} > :since"
+        params['since'] = since
 
     try:
         # Using pandas to execute the SQL query and load data into a DataFrame
-        df_sales = pd.read_sql(query, engine)
+        df_sales = pd.read_sql(text(query), engine, params=params)
         print("Connection to amazon_sales_data successful, and data loaded.")
-        
-        #Closed connection to database sales_data (etl_data)
-        engine.dispose()
-        print("Connection to amazon_sales_data closed")
+        # The connection goes back to the pool of the engine, shared with the other extracts
         return df_sales
     except Exception as e:
         print("Connection failed:", e)
         return None
 
 
+def _stream_query(connection, query, params, chunksize):
+    # Yields the result of the query chunk by chunk over a server-side cursor
+    connection = connection.execution_options(stream_results=True, max_row_buffer=chunksize)
+    yield from pd.read_sql(text(query), connection, params=params, chunksize=chunksize)
+
+
+def extract_sales_data_chunks(chunksize=100_000, table="amazon_sales_data", watermark_column=None, since=None):
+    """
+    Streams sales data from the PostgreSQL database chunk by chunk.
+
+    The query runs on a server-side (named) cursor, so only `chunksize` rows are held
+    in memory at once regardless of the table size. At least one (possibly empty) chunk
+    is yielded, so the columns are always known.
+
+    Args:
+        chunksize (int): Number of rows per chunk.
+        table (str): Table of the sales data.
+        watermark_column (str): Monotonically increasing column (key or timestamp) of the
+            incremental extract. None extracts the whole table.
+        since: Only rows with `watermark_column` greater than this value are extracted.
+
+    Yields:
+        pd.DataFrame: Chunks of the sales data.
+    """
+    engine = postgres_engine_sales_data()
+    quote = engine.dialect.identifier_preparer.quote
+    query = f"SELECT * FROM {quote(table)}"
+    params = {}
+    if watermark_column is not None and since is not None:
+        query += f" WHERE {quote(watermark_column)} > :since"
+        params['since'] = since
+
+    # stream_results makes psycopg2 use a named cursor, rows are fetched max_row_buffer at a time
+    with engine.connect() as connection:
+        empty = True
+        for chunk in _stream_query(connection, query, params, chunksize):
+            empty = False
+            yield chunk
+        if empty:
+            yield pd.read_sql(text(f"SELECT * FROM {quote(table)} LIMIT 0"), connection)
+
+
+def _watermark_value(value):
+    # Convert numpy / pandas scalars to plain values that can be stored as JSON and used as query parameters
+    if pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if hasattr(value, 'item') else value
+
+
+def sales_watermark_of(df, watermark_column, since=None):
+    """
+    Returns the highest `watermark_column` value of the extracted rows, or `since` when they
+    are empty (nothing new).
+    """
+    if not len(df):
+        return since
+    latest = _watermark_value(df[watermark_column].max())
+    if latest is None or (since is not None and latest <= since):
+        return since
+    return latest
+
+
+@traced("extract", table="sales")
+def stream_sales_data(writer, chunksize=100_000, watermark_column=None, since=None):
+    """
+    Extracts the sales data in chunks and writes every chunk as it arrives,
+    then reports the throughput and the peak memory.
+
+    Args:
+        writer: Chunk writer of the destination (see `DataFrameTarget.open_writer`).
+        chunksize (int): Number of rows per chunk.
+        watermark_column (str): Column of the incremental extract, None extracts the whole table.
+        since: Watermark of the previous extract, only newer rows are extracted.
+
+    Returns:
+        dict: Report with the number of rows, seconds, rows per second, peak RSS in MB and the
+        highest `watermark_column` value extracted (the `since` value when nothing is new).
+    """
+    start = time.perf_counter()
+    rows = 0
+    watermark = since
+    for chunk in extract_sales_data_chunks(chunksize=chunksize, watermark_column=watermark_column, since=since):
+        writer.write(chunk)
+        rows += len(chunk)
+        if watermark_column is not None:
+            watermark = sales_watermark_of(chunk, watermark_column, watermark)
+    seconds = time.perf_counter() - start
+
+    report = {
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'watermark': watermark
+    }
+    print(f"Extracted {report['rows']} rows of amazon_sales_data in {report['seconds']}s "
+          f"({report['rows_per_second']} rows/sec), peak RSS {report['peak_rss_mb']} MB")
+    return report
+
+
+def sales_partition_predicates(connection, table, partitions, partition_column=None):
+    """
+    Splits a table into `partitions` ranges that can be read concurrently.
+
+    With a numeric `partition_column`, the [min, max] range of the column is split in equal
+    key ranges (NULL keys go to the first partition). Without it, the table is split on its
+    physical blocks with `ctid` ranges, which PostgreSQL reads with a TID range scan.
+    The last range is left open, so rows added during the extract are not missed.
+
+    Returns:
+        list: (where clause, parameters) of every partition.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+
+    if partition_column is not None:
+        column = quote(partition_column)
+        low, high = connection.execute(text(f"SELECT MIN({column}), MAX({column}) FROM {quote(table)}")).one()
+        if low is None:
+            return [("TRUE", {})]
+        step = (high - low) / partitions
+        if isinstance(low, int) and isinstance(high, int):
+            step = (high - low) // partitions + 1
+        bounds = [low + step * i for i in range(partitions)]
+        predicates = []
+        for i, lower in enumerate(bounds):
+            clause = f"{column} >= :lower"
+            params = {'lower': lower}
+            if i < partitions - 1:
+                clause += f" AND {column} < :upper"
+                params['upper'] = bounds[i + 1]
+            if i == 0:
+                clause = f"({clause}) OR {column} IS NULL"
+            predicates.append((clause, params))
+        return predicates
+
+    blocks = connection.execute(
+        text("SELECT pg_relation_size(CAST(:table AS regclass)) / current_setting('block_size')::int"),
+        {'table': table}
+    ).scalar()
+    step = blocks // partitions + 1
+    predicates = []
+    for i in range(partitions):
+        clause = "ctid >= CAST(:lower AS tid)"
+        params = {'lower': f'({step * i},0)'}
+        if i < partitions - 1:
+            clause += " AND ctid < CAST(:upper AS tid)"
+            params['upper'] = f'({step * (i + 1)},0)'
+        predicates.append((clause, params))
+    return predicates
+
+
+@traced("extract", table="sales")
+def extract_sales_data_partitioned(output_dir, partitions=4, partition_column=None, chunksize=100_000,
+                                   table="amazon_sales_data", watermark_column=None, since=None,
+                                   file_format=None):
+    """
+    Extracts the sales data as `partitions` key (or ctid) ranges read concurrently,
+    each over its own connection of the pooled engine, into one part file per partition.
+
+    Args:
+        output_dir (str): Directory of the part files (part-00000, part-00001, ... in the intermediate format).
+        partitions (int): Number of partitions read at the same time.
+        partition_column (str): Numeric column the ranges are made on, None to split on ctid.
+        chunksize (int): Number of rows per chunk of every partition.
+        table (str): Table of the sales data.
+        watermark_column (str): Column of the incremental extract, None extracts the whole table.
+        since: Watermark of the previous extract, only newer rows are extracted.
+        file_format (str): Intermediate format of the part files, defaults to the [intermediate] config.
+
+    Returns:
+        dict: Report with the part files (DataFrameTarget), rows, seconds, rows per second, peak RSS in MB
+        and the highest `watermark_column` value extracted.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    engine = postgres_engine_sales_data()
+    quote = engine.dialect.identifier_preparer.quote
+    start = time.perf_counter()
+
+    def extract_partition(number, clause, params):
+        query = f"SELECT * FROM {quote(table)} WHERE ({clause})"
+        params = dict(params)
+        if watermark_column is not None and since is not None:
+            query += f" AND {quote(watermark_column)} > :since"
+            params['since'] = since
+
+        part = DataFrameTarget(os.path.join(output_dir, f'part-{number:05d}'), file_format=file_format)
+        rows = 0
+        watermark = since
+        with engine.connect() as connection, part.open_writer() as writer:
+            first = True
+            for chunk in _stream_query(connection, query, params, chunksize):
+                writer.write(chunk)
+                first = False
+                rows += len(chunk)
+                if watermark_column is not None and len(chunk):
+                    chunk_max = _watermark_value(chunk[watermark_column].max())
+                    if chunk_max is not None and (watermark is None or chunk_max > watermark):
+                        watermark = chunk_max
+            if first:
+                # Empty partition, still write the columns
+                writer.write(pd.read_sql(text(f"SELECT * FROM {quote(table)} LIMIT 0"), connection))
+        return part, rows, watermark
+
+    with engine.connect() as connection:
+        predicates = sales_partition_predicates(connection, table, partitions, partition_column)
+
+    # Every thread checks out its own connection of the pool, see DB_POOL_SIZE in db_connector
+    with ThreadPoolExecutor(max_workers=len(predicates)) as executor:
+        results = list(executor.map(lambda args: extract_partition(*args),
+                                    [(i, clause, params) for i, (clause, params) in enumerate(predicates)]))
+
+    seconds = time.perf_counter() - start
+    rows = sum(part_rows for _, part_rows, _ in results)
+    watermarks = [part_watermark for _, _, part_watermark in results if part_watermark is not None]
+    report = {
+        'parts': [part for part, _, _ in results],
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'watermark': max(watermarks) if watermarks else since
+    }
+    print(f"Extracted {report['rows']} rows of {table} in {len(results)} partitions in {report['seconds']}s "
+          f"({report['rows_per_second']} rows/sec), peak RSS {report['peak_rss_mb']} MB")
+    return report
+
+
+def concat_part_files(parts, writer, chunksize=100_000):
+    """
+    Concatenates part files (DataFrameTarget) into one chunk writer, chunk by chunk.
+    """
+    for part in parts:
+        for chunk in part.iter_chunks(chunksize=chunksize):
+            writer.write(chunk)
+
+
+@traced("extract", table="marketing")
 def extract_marketing_data():
     """
     Extracts marketing data from a CSV file and loads it into a DataFrame.
@@ -53,16 +311,73 @@ def extract_marketing_data():
         return None
 
 
-def extract_scraping_data(pages=5, csv_filename='data_source/scraping_data/scraping_kompas.csv'):
+KOMPAS_INDEX_URL = "https://indeks.kompas.com/?site={site}&page={page}"
+
+# CSV headers of the scraping data
+SCRAPING_FIELDNAMES = ['judul', 'topik', 'sub_topik', 'topik_pilihan', 'tanggal_waktu_publish', 'redaksi', 'advetorial', 'isi_berita', 'link', 'topik_pilihan_link']
+
+
+# Append-only archive of every scraped article, one CSV per month of scraping
+SCRAPING_ARCHIVE_DIR = 'data_source/scraping_data/archive'
+
+# Single archive CSV of the scraper before the archive was partitioned, kept as history
+LEGACY_SCRAPING_CSV = 'data_source/scraping_data/scraping_kompas.csv'
+
+
+def _articles_frame(articles):
+    # Fields missing from a page are empty strings, they are missing values like in the archive CSV
+    df = pd.DataFrame(articles, columns=SCRAPING_FIELDNAMES, dtype=object)
+    return df.where(df != '')
+
+
+def scraping_archive_path(archive_dir=SCRAPING_ARCHIVE_DIR, date=None):
+    """
+    Returns the archive partition of the month of `date` (today by default).
     """
-    Scrapes news articles from Kompas website and saves the results into a CSV file.
+    date = date or datetime.date.today()
+    return os.path.join(archive_dir, f'scraping_kompas_{date:%Y-%m}.csv')
+
+
+def stream_scraping_data(pages=5, start_page=1, site='all', date=None, archive_dir=SCRAPING_ARCHIVE_DIR,
+                         batch_size=500, concurrency=4, rate_limit=2.0, index_url=KOMPAS_INDEX_URL,
+                         timeout=(5, 30), max_retries=3, incremental=False,
+                         seen_index_path='data_source/scraping_data/seen_links.sqlite',
+                         parser_backend='strainer', parse_workers=0,
+                         cache_dir='data_source/scraping_data/html_cache', cache_max_bytes=2 * 1024 ** 3):
+    """
+    Scrapes news articles from Kompas website and yields the articles of this run in batches.
+
+    Index pages and articles are fetched concurrently, while the rows are yielded in the
+    same order as a sequential crawl. Only the articles scraped by this run are yielded.
+    Nothing is archived or marked as seen here: the caller passes the batches to
+    `archive_scraped_articles` once it has stored them, so a run that fails in between
+    scrapes the same articles again instead of skipping them.
 
     Args:
         pages (int): Number of pages to scrape.
-        csv_filename (str): Name of the CSV file to save the scraping results.
+        start_page (int): First index page to scrape.
+        site (str): Section of the index, 'all' or a channel like 'news' or 'money'.
+        date (datetime.date): Day of the index to scrape, None for the latest articles.
+        archive_dir (str): Directory of the monthly archive CSVs, read to bootstrap the seen index.
+        batch_size (int): Number of articles per yielded DataFrame.
+        concurrency (int): Maximum number of pages fetched at the same time.
+        rate_limit (float): Maximum requests per second to the same host, None to disable.
+        index_url (str): Template of the index page url, formatted with `site` and `page`.
+        timeout (tuple): (connect, read) timeout in seconds of every request.
+        max_retries (int): Number of retries of a transient failure (connection error, 429, 5xx).
+        incremental (bool): Skip the links that are already scraped, before any request is made,
+            and stop at the first index page whose articles are all known.
+        seen_index_path (str): SQLite file of the already scraped links, used in incremental mode.
+        parser_backend (str): HTML parser backend of `parse_article`, 'html.parser', 'strainer' or 'lxml'.
+        parse_workers (int): Number of processes parsing the articles, decoupled from the fetch
+            threads. 0 parses in the fetch threads.
+        cache_dir (str): Directory of the raw HTML cache of the article pages, None to disable.
+            Cached pages are revalidated with ETag / Last-Modified and can be replayed
+            with `replay_scraping_data`.
+        cache_max_bytes (int): Maximum compressed size of the HTML cache.
 
-    Returns:
-        pd.DataFrame: DataFrame containing the scraped news data.
+    Yields:
+        pd.DataFrame: Up to `batch_size` scraped articles.
     """
     # Create a dedicated logger for the scraping function
     logger = logging.getLogger('scraping_logger')
@@ -73,96 +388,206 @@ def extract_scraping_data(pages=5, csv_filename='data_source/scraping_data/scrap
 
     RED = "\033[91m"  # Red color for errors
 
-    # CSV headers
-    fieldnames = ['judul', 'topik', 'sub_topik', 'topik_pilihan', 'tanggal_waktu_publish', 'redaksi', 'advetorial', 'isi_berita', 'link', 'topik_pilihan_link']
+    # The index of a past day lists the articles published that day
+    date_query = f"&date={date:%Y-%m-%d}" if date is not None else ""
+    index_urls = [(i, index_url.format(site=site, page=i) + date_query) for i in range(start_page, start_page + pages)]
+    # In incremental mode, load the already scraped links (bootstrapped from the archives the first time)
+    seen_index = None
+    link_filter = None
+    skipped_links = 0
+    if incremental:
+        with SeenLinkIndex(seen_index_path) as seen_index:
+            seen_index.bootstrap_from_csv(LEGACY_SCRAPING_CSV, *sorted(glob.glob(os.path.join(archive_dir, '*.csv'))))
+
+        def link_filter(link):
+            nonlocal skipped_links
+            if link in seen_index:
+                skipped_links += 1
+                return False
+            return True
+
+    # One pooled session shared by all workers, for both index and article pages
+    cache = HtmlCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    client = ScrapingClient(pool_size=concurrency, timeout=timeout, max_retries=max_retries, cache=cache)
 
-    # Open the CSV file in append mode and write the header if the file is new
-    with open(csv_filename, mode='a', newline='', encoding='utf-8') as file:
+    with client:
         # Sign the scrapping process begin
         print(f"========== Scraping data kompas begin ==========")
-        
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if file.tell() == 0:  # Write header only if the file is new
-            writer.writeheader()
-
-        # Loop through each page to scrape articles
-        for i in tqdm(range(1, pages + 1), desc="Scraping pages"):
-            try:
-                url = f"https://indeks.kompas.com/?site=all&page={i}"
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                links = [link.get('href') for link in soup.find_all('a', class_='article-link')]
-
-                # Loop through each article link
-                for j, link in enumerate(tqdm(links, desc=f"Scraping articles on page {i}", leave=False)):
-                    try:
-                        response_news = BeautifulSoup(requests.get(link).text, 'html.parser')
-
-                        # Scrape advertorial information
-                        advetorial = response_news.find('div', class_='kcm__header__advertorial')
-                        advetorial = advetorial.get_text() if advetorial else ''
-
-                        # Scrape breadcrumb topics
-                        topic_tags = response_news.find_all('li', class_='breadcrumb__item')
-                        topics = [tag.find('span').get_text() for tag in topic_tags]
-                        topik = topics[1] if len(topics) > 1 else ''
-                        sub_topik = topics[2] if len(topics) > 2 else ''
-
-                        # Scrape optional topic link
-                        topik_pilihan = ''
-                        topik_pilihan_link = ''
-                        if response_news.find('div', class_='topicSubtitle'):
-                            topik_pilihan = response_news.find('div', class_='topicSubtitle').find('a').get_text()
-                            topik_pilihan_link = response_news.find('div', class_='topicSubtitle').find('a').get('href')
-
-                        # Scrape article title
-                        judul = response_news.find('h1', class_='read__title')
-                        judul = judul.get_text() if judul else ''
-
-                        # Scrape publication date and time
-                        tanggal_waktu_publish = response_news.find('div', class_='read__time')
-                        tanggal_waktu_publish = tanggal_waktu_publish.get_text().split(' - ')[1] if tanggal_waktu_publish else ''
-
-                        # Scrape author or editor names
-                        redaksi_tag = response_news.find('div', class_='credit-title-name')
-                        redaksi = ' '.join([penulis.get_text() for penulis in redaksi_tag.find_all('h6')]) if redaksi_tag else ''
-
-                        # Scrape article content
-                        konteks_tag = response_news.find('div', class_='read__content')
-                        isi_berita = ' '.join([konteks.get_text() for konteks in konteks_tag.find_all('p')]) if konteks_tag else ''
-
-                        # Store the scraped result into a dictionary
-                        result = {
-                            'judul': judul,
-                            'topik': topik,
-                            'sub_topik': sub_topik,
-                            'topik_pilihan': topik_pilihan,
-                            'tanggal_waktu_publish': tanggal_waktu_publish,
-                            'redaksi': redaksi,
-                            'advetorial': advetorial,
-                            'isi_berita': isi_berita,
-                            'link': link,
-                            'topik_pilihan_link': topik_pilihan_link
-                        }
-
-                        # Write the result to the CSV file
-                        writer.writerow(result)
-
-                        # Random delay to avoid getting blocked
-                        time.sleep(random.uniform(0.1, 1))
-
-                    except Exception as e:
-                        print(f'{RED}ERROR - page {i} link {j + 1} = {link}')
-                        logging.error(f'ERROR - page {i} link {j + 1} = {link}')
-                        time.sleep(random.uniform(0.1, 1))
-
-            except Exception as e:
-                print(f'{RED}ERROR - page {i}')
-                logging.error(f'ERROR - page {i}')
+
+        crawler = crawl(index_urls,
+                        fetch=client.fetch_html,
+                        # Index pages change all the time, they are never cached
+                        fetch_index=partial(client.fetch_html, use_cache=False),
+                        parse_index=partial(parse_index, backend=parser_backend),
+                        parse_article=partial(parse_article, backend=parser_backend),
+                        concurrency=concurrency,
+                        rate_limit=rate_limit,
+                        link_filter=link_filter,
+                        stop_when_page_known=incremental,
+                        parse_workers=parse_workers)
+        batch = []
+
+        # Results arrive in page and link order, so the archive keeps the sequential order
+        for i, j, link, result, error in tqdm(crawler, desc="Scraping articles"):
+            if error is not None:
+                if j is None:
+                    print(f'{RED}ERROR - page {i}')
+                    logger.error(f'ERROR - page {i}')
+                else:
+                    print(f'{RED}ERROR - page {i} link {j} = {link}')
+                    logger.error(f'ERROR - page {i} link {j} = {link}')
                 continue
+
+            result['link'] = link
+            batch.append(result)
+            if len(batch) >= batch_size:
+                yield _articles_frame(batch)
+                batch = []
+
+        if seen_index is not None:
+            print(f"Incremental mode: {skipped_links} already scraped links skipped")
+        if batch:
+            yield _articles_frame(batch)
+
+    if cache is not None:
+        cache.close()
     
+    logger.info(f"HTTP requests: {client.stats['requests']}, retries: {client.stats['retries']}, failures: {client.stats['failures']}, not modified: {client.stats['not_modified']}")
+    print(f"HTTP requests: {client.stats['requests']}, retries: {client.stats['retries']}, failures: {client.stats['failures']}, not modified: {client.stats['not_modified']}")
+
     # Sign the scrapping process ended
-    print(f"========== Scraping data kompas end then return the dataframe ==========")
-    # Load the scraped data into a DataFrame
-    df_scraping = pd.read_csv(csv_filename)
-    return df_scraping
+    print(f"========== Scraping data kompas end ==========")
+
+
+def archive_scraped_articles(batches, date=None, archive_dir=SCRAPING_ARCHIVE_DIR, mark_seen=False,
+                             seen_index_path='data_source/scraping_data/seen_links.sqlite'):
+    """
+    Appends scraped articles to the monthly archive partition of `date` (or of today), then
+    marks their links as seen. Called once the articles are stored, so an article is only
+    skipped by the next incremental run after it made it to the output of this one.
+
+    Args:
+        batches (iterable): DataFrames of articles, as yielded by `stream_scraping_data`.
+        date (datetime.date): Day of the scraped index, chooses the archive partition.
+        archive_dir (str): Directory of the monthly archive CSVs.
+        mark_seen (bool): Add the links to the seen index of the incremental mode.
+        seen_index_path (str): SQLite file of the already scraped links.
+
+    Returns:
+        int: Number of archived articles.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    articles = 0
+    links = []
+    # Open the archive partition in append mode and write the header if the file is new
+    with open(scraping_archive_path(archive_dir, date), mode='a', newline='', encoding='utf-8') as file:
+        for batch in batches:
+            batch[SCRAPING_FIELDNAMES].to_csv(file, header=file.tell() == 0, index=False)
+            links.extend(batch['link'].dropna())
+            articles += len(batch)
+
+    # The links are marked only after their rows are in the archive
+    if mark_seen:
+        with SeenLinkIndex(seen_index_path) as seen_index:
+            seen_index.add_many(links)
+    return articles
+
+
+@traced("extract", table="scraping")
+def extract_scraping_data(pages=5, csv_filename=None, **kwargs):
+    """
+    Scrapes news articles from Kompas website and archives them, see `stream_scraping_data`
+    for the arguments.
+
+    Args:
+        pages (int): Number of pages to scrape.
+        csv_filename (str): Deprecated, the articles are archived in the monthly partitions of
+            `archive_dir`. When given, the articles of this run are also appended to this CSV
+            as before.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the news data scraped by this run (no longer the
+        whole CSV).
+    """
+    if csv_filename is not None:
+        warnings.warn("extract_scraping_data(csv_filename=...) is deprecated, the articles are archived "
+                      "in the monthly partitions of archive_dir", DeprecationWarning, stacklevel=3)
+
+    batches = list(stream_scraping_data(pages=pages, **kwargs))
+    df = pd.concat(batches, ignore_index=True) if batches else _articles_frame([])
+    archive_kwargs = {key: kwargs[key] for key in ('date', 'archive_dir', 'seen_index_path') if key in kwargs}
+    archive_scraped_articles([df], mark_seen=kwargs.get('incremental', False), **archive_kwargs)
+    if csv_filename is not None:
+        with open(csv_filename, mode='a', newline='', encoding='utf-8') as file:
+            df[SCRAPING_FIELDNAMES].to_csv(file, header=file.tell() == 0, index=False)
+    return df
+
+
+def _parse_or_error(parse, html):
+    # Module level so it can be sent to the parse processes, errors are returned instead of raised
+    if html is None:
+        return None, 'page is not cached'
+    try:
+        return parse(html), None
+    except Exception as e:
+        return None, repr(e)
+
+
+@traced("extract", table="scraping")
+def replay_scraping_data(date=None, cache_dir='data_source/scraping_data/html_cache', parser_backend='strainer',
+                         parse_workers=0, batch_size=256):
+    """
+    Rebuilds the scraping data purely from the raw HTML cache, without any HTTP request.
+    Used to regenerate the data after a change of the field extraction.
+
+    The cache only knows when a page was fetched, not which index day it was listed on, so a
+    day is rebuilt from the pages fetched (or revalidated) on that day: the day of the daily
+    run. A backfill scraped on a later day is replayed under the day it ran.
+
+    Args:
+        date (datetime.date): Day the pages were fetched, None replays every cached page.
+        cache_dir (str): Directory of the raw HTML cache filled by `extract_scraping_data`.
+        parser_backend (str): HTML parser backend of `parse_article`.
+        parse_workers (int): Number of processes parsing the cached pages, 0 to parse in this process.
+        batch_size (int): Number of cached pages read into memory at once.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the news data of every cached article, in fetch order.
+    """
+    RED = "\033[91m"  # Red color for errors
+
+    print(f"========== Replay scraping data kompas from {cache_dir} begin ==========")
+    cache = HtmlCache(cache_dir, max_bytes=None)
+    links = cache.urls(fetched_on=date)
+    parse = partial(parse_article, backend=parser_backend)
+    parse_executor = start_parse_pool(parse_workers)
+    results = []
+
+    try:
+        with tqdm(total=len(links), desc="Replaying articles") as progress:
+            for start in range(0, len(links), batch_size):
+                batch = links[start:start + batch_size]
+                htmls = []
+                for link in batch:
+                    entry = cache.get(link)
+                    htmls.append(entry['body'] if entry else None)
+
+                if parse_executor is None:
+                    parsed = map(_parse_or_error, repeat(parse), htmls)
+                else:
+                    parsed = parse_executor.map(_parse_or_error, repeat(parse), htmls, chunksize=4)
+
+                for link, (result, error) in zip(batch, parsed):
+                    progress.update()
+                    if error is not None:
+                        print(f'{RED}ERROR - replay link = {link} ({error})')
+                        continue
+                    result['link'] = link
+                    results.append(result)
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown()
+        cache.close()
+
+    print(f"========== Replay scraping data kompas end, {len(results)} articles ==========")
+    return _articles_frame(results)
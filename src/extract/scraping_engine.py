@@ -0,0 +1,232 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Tokens are refilled continuously at `rate` tokens
+    per second up to `capacity`, every request consumes one token and waits
+    only as long as needed when the bucket is empty.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Keeps one token bucket per host so every site is scraped politely,
+    regardless of how many workers are fetching at the same time.
+    A `rate` of None (or <= 0) disables the token buckets, a host paused
+    with `pause` (e.g. after a 429 Too Many Requests) is still waited for.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        # Monotonic time until which every request to the host waits
+        self.paused_until = {}
+        self.lock = threading.Lock()
+
+    def pause(self, url, seconds):
+        """
+        Holds every request to the host of `url` for `seconds`, in all threads.
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            self.paused_until[host] = max(self.paused_until.get(host, 0), time.monotonic() + seconds)
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        while True:
+            with self.lock:
+                wait = self.paused_until.get(host, 0) - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+
+        if not self.rate or self.rate <= 0:
+            return
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def parse_in_pool(fetch_future, parse_executor, parse):
+    """
+    Chains a fetch future to a parse in the process pool, without blocking a fetch thread
+    while the page is parsed. Returns a future of the parsed result.
+    """
+    result = Future()
+
+    def on_parsed(parse_future):
+        try:
+            result.set_result(parse_future.result())
+        except Exception as e:
+            result.set_exception(e)
+
+    def on_fetched(fetch_future):
+        try:
+            parse_executor.submit(parse, fetch_future.result()).add_done_callback(on_parsed)
+        except Exception as e:
+            result.set_exception(e)
+
+    fetch_future.add_done_callback(on_fetched)
+    return result
+
+
+def start_parse_pool(parse_workers):
+    """
+    Creates the process pool of the parse stage, or None when parsing runs in the fetch threads.
+    """
+    if not parse_workers or parse_workers <= 0:
+        return None
+    parse_executor = ProcessPoolExecutor(max_workers=parse_workers)
+    # Start the worker processes now, before any fetch thread exists (forking a threaded process is unsafe)
+    parse_executor.submit(int).result()
+    return parse_executor
+
+
+def crawl(index_urls, fetch, parse_index, parse_article, concurrency=4, rate_limit=2.0,
+          link_filter=None, stop_when_page_known=False, parse_workers=0, fetch_index=None):
+    """
+    Fetches index pages and their article pages concurrently with a bounded thread pool.
+
+    Results are yielded in the same order as a sequential crawl (page by page, link by link),
+    so the CSV output does not depend on which request finished first.
+
+    With `parse_workers`, the crawl is split into a fetch stage (threads) and a parse stage
+    (ProcessPoolExecutor), so parsing uses all cores instead of competing with the network
+    threads for the GIL. Both stages are bounded by the window of articles in flight:
+    when parsing falls behind, no new article is fetched until the writer catches up.
+
+    Args:
+        index_urls (list): List of (page_number, url) tuples of the index pages.
+        fetch (callable): Function that takes a url and a `limiter` keyword (HostRateLimiter)
+            and returns the response body. It acquires the limiter before every attempt,
+            see ScrapingClient.get.
+        parse_index (callable): Function that takes an index page body and returns the article links.
+        parse_article (callable): Function that takes an article body and returns a dictionary.
+        concurrency (int): Maximum number of requests in flight.
+        rate_limit (float): Maximum requests per second per host (None to disable).
+        link_filter (callable): Function that takes a link and returns False when it must be
+            skipped (e.g. already scraped). Skipped links are never requested.
+        stop_when_page_known (bool): Stop the crawl at the first index page whose links are
+            all skipped by `link_filter`, the following (older) pages are not requested.
+            Links only scheduled earlier in the same run do not stop the crawl.
+        parse_workers (int): Number of processes parsing the articles, 0 to parse in the
+            fetch threads. `parse_article` must be picklable.
+        fetch_index (callable): Function fetching the index pages, defaults to `fetch`.
+
+    Yields:
+        tuple: (page, link_number, link, result, error). `link_number` is None when the
+        index page itself failed, `error` is None when the page was scraped successfully.
+    """
+    concurrency = max(1, int(concurrency))
+    limiter = HostRateLimiter(rate_limit, burst=concurrency)
+
+    # The limiter is acquired by the fetch before every attempt, retries included
+    def polite_fetch(url):
+        return fetch(url, limiter=limiter)
+
+    def scrape_index(url):
+        return parse_index((fetch_index or fetch)(url, limiter=limiter))
+
+    def scrape_article(link):
+        return parse_article(polite_fetch(link))
+
+    def resolve(page, number, link, future):
+        try:
+            return page, number, link, future.result(), None
+        except Exception as e:
+            return page, number, link, None, e
+
+    # Keep a bounded window of articles in flight so memory does not grow with the crawl size
+    window = max(concurrency, parse_workers or 0) * 4
+    # Links already scheduled in this run, the index shifts while new articles are published
+    scheduled = set()
+
+    parse_executor = start_parse_pool(parse_workers)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def submit_article(link):
+        if parse_executor is None:
+            return executor.submit(scrape_article, link)
+        return parse_in_pool(executor.submit(polite_fetch, link), parse_executor, parse_article)
+
+    try:
+        # Index pages are requested a few pages ahead, they are small and give the article links
+        index_iter = iter(index_urls)
+        index_futures = deque()
+
+        def schedule_index_pages():
+            while len(index_futures) < concurrency:
+                page_url = next(index_iter, None)
+                if page_url is None:
+                    return
+                page, url = page_url
+                index_futures.append((page, url, executor.submit(scrape_index, url)))
+
+        schedule_index_pages()
+        pending = deque()
+
+        while index_futures:
+            page, url, index_future = index_futures.popleft()
+            try:
+                links = index_future.result()
+            except Exception:
+                # Keep the failed index page in order, the error is taken from the future
+                pending.append((page, None, url, index_future))
+                schedule_index_pages()
+                continue
+
+            unseen_links = {link for link in links if link_filter is None or link_filter(link)}
+
+            # Only links known before the run count: when new articles are published during the
+            # crawl, the index shifts and a page can hold only links already scheduled in this
+            # run while the older pages are still unknown.
+            if stop_when_page_known and links and not unseen_links:
+                # Every article of this page is known, so are the older pages
+                for _, _, future in index_futures:
+                    future.cancel()
+                index_futures.clear()
+                break
+
+            for number, link in enumerate(links, start=1):
+                if link in unseen_links and link not in scheduled:
+                    scheduled.add(link)
+                    pending.append((page, number, link, submit_article(link)))
+
+            schedule_index_pages()
+
+            while len(pending) > window:
+                yield resolve(*pending.popleft())
+
+        while pending:
+            yield resolve(*pending.popleft())
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if parse_executor is not None:
+            parse_executor.shutdown(cancel_futures=True)
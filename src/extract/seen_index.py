@@ -0,0 +1,74 @@
+import csv
+import os
+import sqlite3
+from datetime import datetime
+
+
+class SeenLinkIndex:
+    """
+    Persistent index of the article links already scraped, stored in a small SQLite table.
+
+    All links are loaded into memory at startup, so checking a link costs a set lookup
+    and no HTTP request is made for an article that is already in the archive.
+
+    Args:
+        path (str): Location of the SQLite database file.
+    """
+
+    def __init__(self, path='data_source/scraping_data/seen_links.sqlite'):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS seen_links (link TEXT PRIMARY KEY, scraped_at TEXT NOT NULL)"
+        )
+        self.links = {row[0] for row in self.connection.execute("SELECT link FROM seen_links")}
+
+    def __contains__(self, link):
+        return link in self.links
+
+    def __len__(self):
+        return len(self.links)
+
+    def add_many(self, links):
+        """
+        Marks the given links as scraped.
+        """
+        new_links = [link for link in set(links) if link and link not in self.links]
+        if not new_links:
+            return
+        scraped_at = datetime.now().isoformat(timespec='seconds')
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO seen_links (link, scraped_at) VALUES (?, ?)",
+                [(link, scraped_at) for link in new_links]
+            )
+        self.links.update(new_links)
+
+    def add(self, link):
+        self.add_many([link])
+
+    def bootstrap_from_csv(self, *csv_filenames):
+        """
+        Fills an empty index with the links of the existing scraping archives,
+        so switching to incremental mode does not re-scrape the history.
+        """
+        if self.links:
+            return
+        for csv_filename in csv_filenames:
+            if not os.path.exists(csv_filename):
+                continue
+            with open(csv_filename, newline='', encoding='utf-8') as file:
+                self.add_many(row['link'] for row in csv.DictReader(file))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,7 +1,34 @@
 import os
+import threading
+from contextlib import contextmanager
+
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+# Prefix of the environment variables of every database, e.g. DB_HOST_DWH
+DATABASES = {
+    "sales_data": "SALES_DATA",
+    "dwh": "DWH",
+}
+
+# Pool settings, read from DB_<SETTING>_<DATABASE> or else DB_<SETTING>, e.g. DB_POOL_SIZE_DWH=8.
+# The partitioned sales extract holds one connection per partition at the same time.
+POOL_DEFAULTS = {
+    "POOL_SIZE": 5,
+    "MAX_OVERFLOW": 10,
+    # Seconds waited for a free connection before giving up
+    "POOL_TIMEOUT": 30,
+    # Connections older than this many seconds are replaced, -1 keeps them
+    "POOL_RECYCLE": 1800,
+    # Milliseconds a statement may run before PostgreSQL cancels it, 0 for no limit
+    "STATEMENT_TIMEOUT_MS": 0,
+}
+
+# Engines of the current process, created on first use
+_engines = {}
+_engines_lock = threading.Lock()
+
+
 def load_env():
     """
     Memuat variabel lingkungan dari file .env di folder yang sama
@@ -9,48 +36,99 @@ def load_env():
     env_path = os.path.join(os.path.dirname(__file__), '.env')
     load_dotenv(dotenv_path=env_path)
 
-def postgres_engine_sales_data():
-    """
-    Helper function untuk melakukan koneksi antara Pandas
-    dengan PostgreSQL. Sesuaikan username, password,
-    host, dan database name dengan milik masing - masing
-    """
-    # Memuat file .env dari folder yang sama
+
+def _setting(name, prefix):
+    value = os.getenv(f"DB_{name}_{prefix}", os.getenv(f"DB_{name}"))
+    return int(value) if value not in (None, "") else POOL_DEFAULTS[name]
+
+
+def _create_engine(database):
     load_env()
+    prefix = DATABASES[database]
 
     # Mengambil variabel lingkungan
-    DB_USERNAME = os.getenv("DB_USERNAME_SALES_DATA")
-    DB_PASSWORD = os.getenv("DB_PASSWORD_SALES_DATA")
-    DB_HOST = os.getenv("DB_HOST_SALES_DATA")
-    DB_NAME = os.getenv("DB_NAME_SALES_DATA")
-    DB_PORT = os.getenv("DB_PORT_SALES_DATA")
+    DB_USERNAME = os.getenv(f"DB_USERNAME_{prefix}")
+    DB_PASSWORD = os.getenv(f"DB_PASSWORD_{prefix}")
+    DB_HOST = os.getenv(f"DB_HOST_{prefix}")
+    DB_NAME = os.getenv(f"DB_NAME_{prefix}")
+    DB_PORT = os.getenv(f"DB_PORT_{prefix}")
+
+    connect_args = {}
+    statement_timeout = _setting("STATEMENT_TIMEOUT_MS", prefix)
+    if statement_timeout > 0:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
 
     # Membuat string koneksi
     connection_string = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    engine = create_engine(connection_string)
+    return create_engine(connection_string,
+                         pool_size=_setting("POOL_SIZE", prefix),
+                         max_overflow=_setting("MAX_OVERFLOW", prefix),
+                         pool_timeout=_setting("POOL_TIMEOUT", prefix),
+                         pool_recycle=_setting("POOL_RECYCLE", prefix),
+                         # A connection dropped by the server (restart, idle timeout) is replaced on checkout
+                         pool_pre_ping=True,
+                         connect_args=connect_args)
 
-    return engine
 
-def postgres_engine_dwh():
+def get_engine(database):
+    """
+    Returns the pooled engine of a database ('sales_data' or 'dwh'), created on first use
+    and then shared by every caller (and thread) of the process.
+
+    Luigi runs tasks in forked worker processes, an engine is never shared across processes:
+    the connections inherited from the parent are left to it and the child opens its own.
+    """
+    with _engines_lock:
+        engine = _engines.get(database)
+        if engine is None:
+            engine = _engines[database] = _create_engine(database)
+        return engine
+
+
+def _forget_inherited_engines():
+    # In a forked child, the pooled connections belong to the parent: drop them without closing.
+    # The lock may have been held by another thread of the parent at the time of the fork.
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_engines)
+
+
+@contextmanager
+def raw_connection(database):
+    """
+    Yields a psycopg2 connection of the pool, e.g. for `cursor.copy_expert` COPY streams
+    without SQLAlchemy in between. Committed when the block succeeds, rolled back otherwise,
+    then returned to the pool.
+    """
+    connection = get_engine(database).raw_connection()
+    try:
+        yield connection.driver_connection
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def postgres_engine_sales_data():
     """
     Helper function untuk melakukan koneksi antara Pandas
     dengan PostgreSQL. Sesuaikan username, password,
     host, dan database name dengan milik masing - masing
     """
-    # Memuat file .env dari folder yang sama
-    load_env()
+    return get_engine("sales_data")
 
-    # Mengambil variabel lingkungan
-    DB_USERNAME = os.getenv("DB_USERNAME_DWH")
-    DB_PASSWORD = os.getenv("DB_PASSWORD_DWH")
-    DB_HOST = os.getenv("DB_HOST_DWH")
-    DB_NAME = os.getenv("DB_NAME_DWH")
-    DB_PORT = os.getenv("DB_PORT_DWH")
 
-    # Membuat string koneksi
-    connection_string = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    engine = create_engine(connection_string)
-
-    return engine
-
-# engine_sales_data = postgres_engine_sales_data()
\ No newline at end of file
+def postgres_engine_dwh():
+    """
+    Helper function untuk melakukan koneksi antara Pandas
+    dengan PostgreSQL. Sesuaikan username, password,
+    host, dan database name dengan milik masing - masing
+    """
+    return get_engine("dwh")
@@ -0,0 +1,182 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # without pyarrow, unique text columns stay Python object strings
+    pyarrow = None
+
+# Declared schema of the DWH tables
+INIT_SQL = 'data_warehouse/init.sql'
+
+# A text column is stored as a category when it has at most this share of distinct values
+CATEGORY_MAX_RATIO = 0.5
+
+STRING_DTYPE = 'string[pyarrow]' if pyarrow is not None else None
+
+# Smallest integer dtypes first
+INTEGER_DTYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+@lru_cache(maxsize=None)
+def read_schema(path=INIT_SQL):
+    """
+    Reads the columns and SQL types of every table from the CREATE TABLE statements.
+
+    Returns:
+        dict: {table: {column: sql_type}}, names in lowercase like PostgreSQL stores them.
+    """
+    with open(path, encoding='utf-8') as file:
+        sql = file.read()
+
+    schema = {}
+    for table, body in re.findall(r'CREATE TABLE IF NOT EXISTS\s+(\w+)\s*\((.*?)\);', sql, flags=re.S | re.I):
+        columns = {}
+        for line in body.splitlines():
+            match = re.match(r'\s*(\w+)\s+([A-Za-z]+)', line)
+            if match and match.group(1).upper() not in ('PRIMARY', 'CONSTRAINT', 'UNIQUE', 'FOREIGN'):
+                columns[match.group(1).lower()] = match.group(2).upper()
+        schema[table.lower()] = columns
+    return schema
+
+
+def _smallest_integer(column):
+    # Nullable integers keep their missing values
+    nullable = isinstance(column.dtype, pd.api.extensions.ExtensionDtype) or column.isna().any()
+    low, high = (column.min(), column.max()) if column.notna().any() else (0, 0)
+    for dtype in INTEGER_DTYPES:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return dtype.capitalize() if nullable else dtype
+    return 'Int64' if nullable else 'int64'
+
+
+def plan_column(column, sql_type=None, category_max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Returns the compact dtype of a column, or None when the current dtype is kept.
+
+    - Text: 'category' when the values repeat, otherwise 'string[pyarrow]'.
+    - REAL columns: float32, the precision of a PostgreSQL REAL.
+    - Integers of numeric or undeclared columns: the smallest integer dtype that holds every value.
+    Datetimes, booleans and the floats of undeclared columns are kept.
+    """
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return None
+    if pd.api.types.is_integer_dtype(dtype):
+        # Numbers in a TEXT column (e.g. codes read from a CSV) are left alone
+        if sql_type == 'TEXT':
+            return None
+        planned = _smallest_integer(column)
+        return planned if planned != str(dtype) else None
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float32' if sql_type == 'REAL' and dtype != 'float32' else None
+
+    if sql_type not in (None, 'TEXT') or len(column) == 0:
+        return None
+    if column.nunique(dropna=True) <= category_max_ratio * len(column):
+        return 'category'
+    # Only real text is converted, a mixed object column would have its numbers turned into text
+    if STRING_DTYPE and pd.api.types.is_object_dtype(dtype) and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+        return STRING_DTYPE
+    return None
+
+
+def plan_dtypes(df, table, category_max_ratio=CATEGORY_MAX_RATIO, schema_path=INIT_SQL):
+    """
+    Plans the compact dtype of every column of a DataFrame, using the type declared
+    for the column of `table` in init.sql.
+
+    Returns:
+        dict: {column: dtype} of the columns that change.
+    """
+    declared = read_schema(schema_path).get(table, {})
+    plan = {}
+    for column in df.columns:
+        dtype = plan_column(df[column], declared.get(str(column).lower()), category_max_ratio)
+        if dtype is not None:
+            plan[column] = dtype
+    return plan
+
+
+def compact_dtypes(df, table, category_max_ratio=CATEGORY_MAX_RATIO, schema_path=INIT_SQL):
+    """
+    Converts a DataFrame to the compact dtypes planned by plan_dtypes.
+
+    Returns:
+        tuple: The converted DataFrame and a report of the memory of every column
+               (dtype and MB before / after).
+    """
+    plan = plan_dtypes(df, table, category_max_ratio, schema_path)
+    report = pd.DataFrame({
+        'dtype_before': df.dtypes.astype(str),
+        'mb_before': df.memory_usage(deep=True, index=False) / 1024 ** 2
+    })
+    df = df.astype(plan)
+    report['dtype_after'] = df.dtypes.astype(str)
+    report['mb_after'] = df.memory_usage(deep=True, index=False) / 1024 ** 2
+    return df, report
+
+
+class ChunkDtypePlan:
+    """
+    Dtype plan of a DataFrame streamed chunk by chunk (see transform_in_chunks).
+
+    The plan is made on the first chunk and kept for the whole stream, so every chunk of the
+    file gets the same kind of dtype. Only integers are sized per chunk: a chunk with larger
+    values gets a wider integer dtype, which the chunk writers promote the file to. A column
+    whose dtype no longer matches the plan in a later chunk (e.g. integers with missing values
+    read as floats) keeps its dtype.
+    """
+
+    def __init__(self, table, category_max_ratio=CATEGORY_MAX_RATIO, schema_path=INIT_SQL):
+        self.table = table
+        self.category_max_ratio = category_max_ratio
+        self.schema_path = schema_path
+        self.plan = None
+
+    def _chunk_plan(self, df):
+        plan = {}
+        for column, dtype in self.plan.items():
+            if column not in df.columns:
+                continue
+            current = df[column].dtype
+            if dtype.lower() in INTEGER_DTYPES:
+                if pd.api.types.is_integer_dtype(current):
+                    needed = _smallest_integer(df[column])
+                    widest = max(INTEGER_DTYPES.index(dtype.lower()), INTEGER_DTYPES.index(needed.lower()))
+                    nullable = dtype[0].isupper() or needed[0].isupper()
+                    planned = INTEGER_DTYPES[widest]
+                    plan[column] = planned.capitalize() if nullable else planned
+            elif dtype == 'float32':
+                if pd.api.types.is_float_dtype(current):
+                    plan[column] = dtype
+            elif pd.api.types.is_object_dtype(current) or pd.api.types.is_string_dtype(current) \
+                    or isinstance(current, pd.CategoricalDtype):
+                plan[column] = dtype
+        return plan
+
+    def apply(self, df):
+        """
+        Converts a chunk to the dtypes of the plan, planned on the first chunk.
+        """
+        if self.plan is None:
+            self.plan = plan_dtypes(df, self.table, self.category_max_ratio, self.schema_path)
+        return df.astype(self._chunk_plan(df))
+
+
+def format_memory_report(report, table):
+    """
+    Formats the report of compact_dtypes: the total and every column whose dtype changed.
+    """
+    before, after = report['mb_before'].sum(), report['mb_after'].sum()
+    lines = [f"Memory of `{table}`: {before:.1f} MB -> {after:.1f} MB"]
+    changed = report[report['dtype_before'] != report['dtype_after']].sort_values('mb_before', ascending=False)
+    for column, row in changed.iterrows():
+        lines.append(f"  {column:<25} {row['dtype_before']:>15} -> {row['dtype_after']:<15} "
+                     f"{row['mb_before']:9.1f} MB -> {row['mb_after']:.1f} MB")
+    return '\n'.join(lines)
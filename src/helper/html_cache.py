@@ -0,0 +1,166 @@
+import datetime
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class HtmlCache:
+    """
+    Content-addressed on-disk cache of raw HTTP responses.
+
+    Bodies are stored gzip-compressed under the sha256 of their content
+    (`objects/ab/abcd....gz`), so identical pages are stored once, and a small SQLite
+    table maps every URL to its body together with the ETag / Last-Modified validators.
+    When the cache grows over `max_bytes`, the least recently used entries are evicted.
+
+    Args:
+        cache_dir (str): Directory of the cache.
+        max_bytes (int): Maximum compressed size of the cache, None for no limit.
+    """
+
+    def __init__(self, cache_dir='data_source/scraping_data/html_cache', max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+
+        # The cache is shared by the fetch threads of the scraper
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest + '.gz')
+
+    def _read_object(self, digest):
+        with gzip.open(self._object_path(digest), 'rt', encoding='utf-8') as file:
+            return file.read()
+
+    def get(self, url):
+        """
+        Returns the cached entry of the url as a dictionary (body, etag, last_modified),
+        or None when the url is not cached.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT digest, etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified = row
+            try:
+                body = self._read_object(digest)
+            except OSError:
+                # The object is gone (evicted or deleted by hand), forget the entry
+                with self.connection:
+                    self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                return None
+            with self.connection:
+                self.connection.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        return {'body': body, 'etag': etag, 'last_modified': last_modified}
+
+    def conditional_headers(self, entry):
+        """
+        Returns the headers to revalidate a cached entry with a conditional request.
+        """
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Stores the body of a url and evicts old entries if the cache is too large.
+        """
+        payload = gzip.compress(body.encode('utf-8'))
+        digest = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        path = self._object_path(digest)
+
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write to a temporary file first so a crash never leaves a truncated object
+                tmp_path = f'{path}.{threading.get_ident()}.tmp'
+                with open(tmp_path, 'wb') as file:
+                    file.write(payload)
+                os.replace(tmp_path, path)
+
+            now = time.time()
+            with self.connection:
+                self.connection.execute(
+                    """INSERT INTO entries (url, digest, size, etag, last_modified, fetched_at, accessed_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(url) DO UPDATE SET digest = excluded.digest, size = excluded.size,
+                           etag = excluded.etag, last_modified = excluded.last_modified,
+                           fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at""",
+                    (url, digest, len(payload), etag, last_modified, now, now)
+                )
+            self._evict()
+
+    def mark_revalidated(self, url):
+        """
+        Records that the cached body of a url was fetched again, when the server answered
+        304 Not Modified.
+        """
+        with self.lock:
+            now = time.time()
+            with self.connection:
+                self.connection.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                                        (now, now, url))
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop the least recently used entries until the cache is back under 90% of the limit
+        target = self.max_bytes * 0.9
+        rows = self.connection.execute("SELECT url, digest, size FROM entries ORDER BY accessed_at").fetchall()
+        with self.connection:
+            for url, digest, size in rows:
+                if total <= target:
+                    break
+                self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                total -= size
+                still_used = self.connection.execute(
+                    "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if not still_used and os.path.exists(self._object_path(digest)):
+                    os.remove(self._object_path(digest))
+
+    def urls(self, fetched_on=None):
+        """
+        Returns the cached urls in the order they were first fetched, only the urls last
+        fetched (or revalidated) on the day `fetched_on` (a date, local time) when given.
+        """
+        query, params = "SELECT url FROM entries", ()
+        if fetched_on is not None:
+            start = time.mktime(fetched_on.timetuple())
+            end = time.mktime((fetched_on + datetime.timedelta(days=1)).timetuple())
+            query, params = query + " WHERE fetched_at >= ? AND fetched_at < ?", (start, end)
+        with self.lock:
+            return [row[0] for row in self.connection.execute(query + " ORDER BY rowid", params)]
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,154 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes that are worth retrying: rate limited or temporary server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header, which is either a number of seconds or an HTTP date.
+    Returns the number of seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ScrapingClient:
+    """
+    Shared HTTP client for scraping. Keeps a connection-pooled session (keep-alive, no new
+    TCP+TLS handshake per request), applies timeouts and retries transient errors
+    (connection errors, timeouts, 429 and 5xx) with exponential backoff, honouring Retry-After.
+
+    Args:
+        pool_size (int): Maximum number of connections kept open per host.
+        timeout (tuple): (connect, read) timeout in seconds.
+        max_retries (int): Number of retries after the first attempt.
+        backoff_factor (float): Base of the exponential backoff, wait = backoff_factor * 2 ** retry.
+        max_backoff (float): Upper bound of a single wait in seconds.
+        headers (dict): Extra headers sent with every request.
+        cache (HtmlCache): Optional cache of the raw responses, revalidated with conditional requests.
+    """
+
+    def __init__(self, pool_size=10, timeout=(5, 30), max_retries=3, backoff_factor=0.5,
+                 max_backoff=30, headers=None, cache=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        # Counters of the client, updated from several threads
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'not_modified': 0}
+        self.lock = threading.Lock()
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _backoff(self, retry, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return min(self.backoff_factor * (2 ** retry), self.max_backoff)
+
+    def get(self, url, limiter=None, **kwargs):
+        """
+        Sends a GET request, retrying transient failures.
+
+        With a `limiter` (HostRateLimiter), every attempt (retries included) first acquires
+        the limiter of the host, and a 429 or a Retry-After pauses the host for all threads
+        instead of only delaying the thread that received it.
+
+        Returns:
+            requests.Response: The successful response.
+
+        Raises:
+            requests.RequestException: When the request still fails after all retries.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        retry = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire(url)
+            self._count('requests')
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if retry >= self.max_retries:
+                    self._count('failures')
+                    raise
+                wait = self._backoff(retry)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if not response.ok:
+                        self._count('failures')
+                    response.raise_for_status()
+                    return response
+                if retry >= self.max_retries:
+                    self._count('failures')
+                    response.raise_for_status()
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                wait = self._backoff(retry, retry_after)
+                response.close()
+                if limiter is not None and (response.status_code == 429 or retry_after is not None):
+                    # The host asked to slow down, the next acquire waits like the other threads
+                    limiter.pause(url, wait)
+                    wait = 0
+
+            self._count('retries')
+            retry += 1
+            time.sleep(wait)
+
+    def fetch_html(self, url, use_cache=True, limiter=None):
+        """
+        Downloads a page and returns its body as text, see `get` for the `limiter`.
+
+        When the client has a cache, a cached page is revalidated with If-None-Match /
+        If-Modified-Since and its body is reused when the server answers 304 Not Modified.
+        """
+        if self.cache is None or not use_cache:
+            return self.get(url, limiter=limiter).text
+
+        entry = self.cache.get(url)
+        response = self.get(url, limiter=limiter, headers=self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            self._count('not_modified')
+            self.cache.mark_revalidated(url)
+            return entry['body']
+
+        body = response.text
+        self.cache.put(url, body, etag=response.headers.get('ETag'),
+                       last_modified=response.headers.get('Last-Modified'))
+        return body
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,344 @@
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import luigi
+
+# Identifies the spans and task events of one pipeline run. Set when the module is first
+# imported, so the Luigi worker processes forked afterwards share the id of their parent.
+RUN_ID = os.environ.setdefault("ETL_RUN_ID", f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}")
+
+# JSON lines file of the events, None until `configure` is called (spans are then not recorded)
+_events_path = None
+
+# Luigi task running in this process, added to every span
+_context = {}
+
+# Spans open in the current thread, a span nested in one of the same stage is not recorded
+_open_stages = threading.local()
+
+# Wall and CPU time at the start of the running tasks
+_task_starts = {}
+
+# Callable returning the events path, see register_luigi_events
+_events_path_setting = None
+
+# Peak RSS in MB of every open span and task of the process so far, see start_peak
+_peak_windows = []
+_peak_lock = threading.Lock()
+# Highest peak RSS in MB before the last reset of the high-water mark, which ru_maxrss follows on Linux
+_peak_before_reset = 0.0
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident memory of the current process in MB, since it started.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return max(peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024, _peak_before_reset)
+
+
+def _high_water_mark_mb():
+    # VmHWM of the process in MB, the peak RSS since it started or since the last _reset_high_water_mark
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_high_water_mark():
+    # Linux 4.0+: writing 5 to clear_refs sets VmHWM back to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def start_peak():
+    """
+    Starts measuring the peak RSS of a block (a span or a task), returns the window to pass
+    to `end_peak`. The high-water mark of the process is reset at the start of every block;
+    the peak reached before that is first added to the blocks still open, so nested blocks
+    and the later tasks of a worker each get the peak of their own time only.
+    Returns None where the high-water mark cannot be reset (not Linux).
+    """
+    global _peak_before_reset
+    with _peak_lock:
+        peak = _high_water_mark_mb()
+        if peak is None:
+            return None
+        for window in _peak_windows:
+            window[0] = max(window[0], peak)
+        _peak_before_reset = max(_peak_before_reset, peak)
+        if not _reset_high_water_mark():
+            return None
+        window = [0.0]
+        _peak_windows.append(window)
+        return window
+
+
+def end_peak(window):
+    """
+    Returns the peak RSS in MB of the process while the block of `window` was open, or None
+    when it could not be measured.
+    """
+    if window is None:
+        return None
+    with _peak_lock:
+        if window in _peak_windows:
+            _peak_windows.remove(window)
+        return max(window[0], _high_water_mark_mb() or 0.0)
+
+
+def _forget_inherited_peaks():
+    # The spans and tasks open in the parent do not run in a forked Luigi worker
+    global _peak_lock
+    _peak_lock = threading.Lock()
+    _peak_windows.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_peaks)
+
+
+def configure(events_path):
+    """
+    Starts recording the spans and task events as JSON lines in `events_path`, None disables it.
+    """
+    global _events_path
+    _events_path = events_path
+    if events_path and os.path.dirname(events_path):
+        os.makedirs(os.path.dirname(events_path), exist_ok=True)
+
+
+def emit(event):
+    """
+    Appends an event to the JSON lines file. Every event is one short write to a file opened
+    in append mode, so the lines of the parallel Luigi workers do not interleave.
+    """
+    if _events_path is None:
+        return
+    event = {"run_id": RUN_ID, "time": datetime.now().isoformat(timespec="milliseconds"), **_context, **event}
+    with open(_events_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(event, default=str) + "\n")
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Records the wall time, CPU time and peak RSS of a block as a `span` event. The peak is
+    the one of the process while the block ran (`peak_rss_mb`, see start_peak), next to the
+    peak of the process since it started (`process_peak_rss_mb`). Counters
+    such as `rows_in`, `rows_out` or `bytes_written` are given as fields or set on the
+    yielded dict inside the block.
+
+    Usage:
+        with span("transform", table="sales", rows_in=len(df)) as record:
+            df = transform_sales_data(df)
+            record["rows_out"] = len(df)
+    """
+    stages = getattr(_open_stages, "stages", [])
+    record = dict(fields)
+    if _events_path is None or stage in stages:
+        yield record
+        return
+
+    _open_stages.stages = stages + [stage]
+    window = start_peak()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    status = "success"
+    try:
+        yield record
+    except BaseException:
+        status = "failure"
+        raise
+    finally:
+        _open_stages.stages = stages
+        peak = end_peak(window)
+        emit({"event": "span",
+              "stage": stage,
+              "status": status,
+              "wall_seconds": round(time.perf_counter() - start, 4),
+              "cpu_seconds": round(time.process_time() - cpu_start, 4),
+              "peak_rss_mb": round(peak, 1) if peak is not None else None,
+              "process_peak_rss_mb": round(peak_rss_mb(), 1),
+              **record})
+
+
+def _is_dataframe(value):
+    # pandas is not imported for this: while it is not imported, nothing is a DataFrame
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+
+def _rows(value):
+    # Rows of a DataFrame argument or result, or of the report dict of a streaming function
+    if _is_dataframe(value):
+        return len(value)
+    if isinstance(value, dict):
+        return value.get("rows_out", value.get("rows"))
+    return None
+
+
+def traced(stage, table=None):
+    """
+    Decorator recording every call of a function as a span of `stage`, with the rows of its
+    first DataFrame argument as `rows_in` and the rows of its result as `rows_out`.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            fields = {"function": function.__name__}
+            if table is not None:
+                fields["table"] = table
+            rows_in = next((len(arg) for arg in list(args) + list(kwargs.values()) if _is_dataframe(arg)), None)
+            if rows_in is not None:
+                fields["rows_in"] = rows_in
+            with span(stage, **fields) as record:
+                result = function(*args, **kwargs)
+                rows_out = _rows(result)
+                if rows_out is not None:
+                    record["rows_out"] = rows_out
+                return result
+        return wrapper
+    return decorator
+
+
+def _target_bytes(targets):
+    # Size of the files of the Luigi targets that are on disk
+    paths = [getattr(target, "path", None) for target in luigi.task.flatten(targets)]
+    return sum(os.path.getsize(path) for path in paths if path and os.path.isfile(path))
+
+
+def _task_fields(task):
+    return {"task": task.task_id, "task_family": task.get_task_family(), "params": task.to_str_params(only_significant=True)}
+
+
+def on_task_start(task):
+    if _events_path_setting is not None:
+        configure(_events_path_setting())
+    _context.update(task=task.task_id, date=task.to_str_params(only_significant=True).get("date"))
+    _task_starts[task.task_id] = (time.perf_counter(), time.process_time(), start_peak())
+    emit({"event": "task", "status": "start", **_task_fields(task)})
+
+
+def _task_end(task, status, **fields):
+    start, cpu_start, window = _task_starts.pop(task.task_id, (time.perf_counter(), time.process_time(), None))
+    peak = end_peak(window)
+    _context.clear()
+    emit({"event": "task",
+          "status": status,
+          **_task_fields(task),
+          "wall_seconds": round(time.perf_counter() - start, 4),
+          "cpu_seconds": round(time.process_time() - cpu_start, 4),
+          "peak_rss_mb": round(peak, 1) if peak is not None else None,
+          "process_peak_rss_mb": round(peak_rss_mb(), 1),
+          "bytes_read": _target_bytes(task.input()),
+          "bytes_written": _target_bytes(task.output()),
+          **fields})
+
+
+def on_task_success(task):
+    _task_end(task, "success")
+
+
+def on_task_failure(task, exception):
+    _task_end(task, "failure", error=repr(exception))
+
+
+def on_task_processing_time(task, processing_time):
+    emit({"event": "task", "status": "processing_time", **_task_fields(task),
+          "processing_seconds": round(processing_time, 4)})
+
+
+def register_luigi_events(events_path=None, task_class=luigi.Task):
+    """
+    Records the START, SUCCESS, FAILURE and PROCESSING_TIME events of the Luigi tasks.
+
+    Args:
+        events_path (callable): Returns the JSON lines file of the events (None disables them),
+            called when a task starts so the Luigi config and command line are parsed by then.
+    """
+    global _events_path_setting
+    _events_path_setting = events_path
+    task_class.event_handler(luigi.Event.START)(on_task_start)
+    task_class.event_handler(luigi.Event.SUCCESS)(on_task_success)
+    task_class.event_handler(luigi.Event.FAILURE)(on_task_failure)
+    task_class.event_handler(luigi.Event.PROCESSING_TIME)(on_task_processing_time)
+
+
+def _labels(**labels):
+    pairs = ",".join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in labels.items() if value is not None)
+    return "{" + pairs + "}"
+
+
+# Prometheus metric of every field of the task and span events
+TASK_METRICS = {
+    "wall_seconds": "etl_task_wall_seconds",
+    "cpu_seconds": "etl_task_cpu_seconds",
+    "peak_rss_mb": "etl_task_peak_rss_megabytes",
+    "bytes_read": "etl_task_read_bytes",
+    "bytes_written": "etl_task_written_bytes",
+}
+SPAN_METRICS = {
+    "wall_seconds": "etl_stage_wall_seconds",
+    "cpu_seconds": "etl_stage_cpu_seconds",
+    "peak_rss_mb": "etl_stage_peak_rss_megabytes",
+    "rows_in": "etl_stage_rows_in",
+    "rows_out": "etl_stage_rows_out",
+}
+
+
+def write_prometheus_textfile(events_path, textfile_path, run_id=RUN_ID):
+    """
+    Writes the metrics of the tasks and spans of a run as a Prometheus textfile, for the
+    textfile collector of node_exporter. The file is replaced at once so it is never read
+    half written.
+    """
+    if not os.path.exists(events_path):
+        return
+    samples = {}
+    with open(events_path, encoding="utf-8") as file:
+        for line in file:
+            event = json.loads(line)
+            if event.get("run_id") != run_id:
+                continue
+            if event["event"] == "task" and event["status"] in ("success", "failure"):
+                labels = _labels(task_family=event["task_family"], date=event["params"].get("date"))
+                samples[f"etl_task_success{labels}"] = int(event["status"] == "success")
+                metrics = TASK_METRICS
+            elif event["event"] == "span":
+                labels = _labels(stage=event["stage"], table=event.get("table"), function=event.get("function"),
+                                 date=event.get("date"))
+                metrics = SPAN_METRICS
+            else:
+                continue
+            for field, metric in metrics.items():
+                if event.get(field) is not None:
+                    # The latest event wins, e.g. a task retried in the same run
+                    samples[f"{metric}{labels}"] = event[field]
+
+    if os.path.dirname(textfile_path):
+        os.makedirs(os.path.dirname(textfile_path), exist_ok=True)
+    tmp_path = textfile_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        for name in sorted(set(key.split("{")[0] for key in samples)):
+            file.write(f"# TYPE {name} gauge\n")
+            for key, value in samples.items():
+                if key.split("{")[0] == name:
+                    file.write(f"{key} {value}\n")
+        file.write(f"# TYPE etl_run_timestamp_seconds gauge\netl_run_timestamp_seconds {time.time():.0f}\n")
+    os.replace(tmp_path, textfile_path)
@@ -0,0 +1,293 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib.util import find_spec
+
+import luigi
+
+# pyarrow is only needed by the parquet and feather formats. It is imported on first use like
+# pandas, declaring a target (e.g. when Luigi schedules the tasks) does not import either
+HAS_PYARROW = find_spec("pyarrow") is not None
+
+# File extension of every intermediate format
+FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather"
+}
+
+# Target uncompressed size of a Parquet row group
+ROW_GROUP_BYTES = 64 * 1024 ** 2
+
+
+@lru_cache(maxsize=64)
+def _file_digest(path, size, mtime_ns):
+    # Cached on the size and modification time, a file that did not change is not read again
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(path):
+    """
+    Returns the SHA-256 of the content of a file, or None when the file does not exist yet.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_size, stat.st_mtime_ns)
+
+
+class intermediate(luigi.Config):
+    """
+    Format of the data handed from one Luigi task to the next.
+    Set with --intermediate-format or an [intermediate] section in luigi.cfg.
+    """
+    format = luigi.ChoiceParameter(default="parquet", choices=list(FORMATS))
+    compression = luigi.Parameter(default="zstd")
+
+
+def _pyarrow():
+    # pyarrow with its parquet and feather modules
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+    return pyarrow
+
+
+def _pandas_dtype(arrow_type):
+    # `types_mapper` of the reads: pandas stores string[pyarrow] columns as large_string (object
+    # text as string), they are read back as string[pyarrow] instead of Python strings
+    import pandas as pd
+
+    return pd.StringDtype("pyarrow") if arrow_type == _pyarrow().large_string() else None
+
+
+def _to_arrow(df, schema=None):
+    """
+    Converts a DataFrame to an Arrow table. Object columns that Arrow cannot convert
+    (mixed numbers and strings) are stored as strings.
+    """
+    pa = _pyarrow()
+    try:
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _promoted_schema(schema, table):
+    """
+    Schema holding both the rows written with `schema` and the chunk `table`: a column that
+    was empty (null) takes the type of the chunk, integers become floats when the chunk has
+    missing values, and types that do not promote (e.g. strings and numbers) become strings.
+    """
+    pa = _pyarrow()
+    fields = []
+    for field in schema:
+        other = table.schema.field(field.name).type if field.name in table.schema.names else field.type
+        if other != field.type:
+            try:
+                unified = pa.unify_schemas([pa.schema([field]), pa.schema([field.with_type(other)])],
+                                           promote_options="permissive")
+                field = unified.field(0)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields).with_metadata(schema.metadata)
+
+
+class CsvChunkWriter:
+    def __init__(self, path, compression=None):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.first = True
+
+    def write(self, df):
+        # Header is only written with the first chunk
+        df.to_csv(self.file, header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowChunkWriter:
+    """
+    Base of the Arrow chunk writers. The file has the schema of the first chunk, widened when
+    a later chunk does not fit it (see _promoted_schema). The rows already written are then
+    copied batch by batch into a file of the wider schema, which only happens when a type
+    changes, usually in the first chunks.
+    """
+
+    def __init__(self, path, compression="zstd"):
+        self.path = path
+        self.compression = compression
+        self.schema = None
+
+    def write(self, df):
+        table = _to_arrow(df)
+        if self.schema is None:
+            self.schema = table.schema
+            self._open()
+        else:
+            schema = _promoted_schema(self.schema, table)
+            if not schema.equals(self.schema):
+                self._promote(schema)
+            table = table.cast(self.schema)
+        self._write(table)
+
+    def _promote(self, schema):
+        pa = _pyarrow()
+        self._finish()
+        written_path = self.path + ".promote"
+        os.replace(self.path, written_path)
+        self.schema = schema
+        self._open()
+        for batch in self._read_batches(written_path):
+            self._write(pa.Table.from_batches([batch]).cast(schema))
+        os.remove(written_path)
+
+    def close(self):
+        if self.schema is None:
+            self._write_empty()
+        else:
+            self._finish()
+
+
+class ParquetChunkWriter(ArrowChunkWriter):
+    def _open(self):
+        self.writer = _pyarrow().parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+
+    def _write(self, table):
+        # Bounded row groups let a reader stream the file without decompressing all of it at once
+        row_group_size = max(1, ROW_GROUP_BYTES * table.num_rows // max(table.nbytes, 1))
+        self.writer.write_table(table, row_group_size=row_group_size)
+
+    def _finish(self):
+        self.writer.close()
+
+    def _read_batches(self, path):
+        yield from _pyarrow().parquet.ParquetFile(path).iter_batches()
+
+    def _write_empty(self):
+        pa = _pyarrow()
+        pa.parquet.write_table(pa.table({}), self.path)
+
+
+class FeatherChunkWriter(ArrowChunkWriter):
+    def _open(self):
+        pa = _pyarrow()
+        self.sink = pa.OSFile(self.path, 'wb')
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+
+    def _write(self, table):
+        self.writer.write_table(table)
+
+    def _finish(self):
+        self.writer.close()
+        self.sink.close()
+
+    def _read_batches(self, path):
+        pa = _pyarrow()
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+    def _write_empty(self):
+        pa = _pyarrow()
+        pa.feather.write_feather(pa.table({}), self.path)
+
+
+CHUNK_WRITERS = {
+    "csv": CsvChunkWriter,
+    "parquet": ParquetChunkWriter,
+    "feather": FeatherChunkWriter
+}
+
+
+class DataFrameTarget(luigi.LocalTarget):
+    """
+    Luigi target of a DataFrame stored in a pluggable intermediate format.
+
+    Parquet (the default) and Feather keep the schema of the DataFrame (datetimes stay
+    datetimes), are compressed and can read a subset of the columns without parsing the
+    others. CSV keeps the previous behaviour.
+
+    Args:
+        path (str): Path of the file without extension, the extension of the format is added.
+        file_format (str): 'parquet', 'feather' or 'csv', defaults to the [intermediate] config.
+        compression (str): Compression codec of parquet / feather, defaults to the [intermediate] config.
+    """
+
+    def __init__(self, path, file_format=None, compression=None):
+        config = intermediate()
+        self.file_format = file_format or config.format
+        self.compression = compression or config.compression
+        if self.file_format != "csv" and not HAS_PYARROW:
+            raise ImportError(f"The '{self.file_format}' intermediate format requires the pyarrow package")
+        super().__init__(path + FORMATS[self.file_format])
+
+    def read(self, columns=None):
+        """
+        Reads the DataFrame, optionally only the given columns. Parquet and Feather keep the
+        dtypes written, string[pyarrow] included.
+        """
+        import pandas as pd
+
+        if self.file_format == "parquet":
+            return _pyarrow().parquet.read_table(self.path, columns=columns).to_pandas(types_mapper=_pandas_dtype)
+        if self.file_format == "feather":
+            return _pyarrow().feather.read_table(self.path, columns=columns).to_pandas(types_mapper=_pandas_dtype)
+        return pd.read_csv(self.path, usecols=columns)
+
+    def iter_chunks(self, chunksize=100_000):
+        """
+        Reads the DataFrame chunk by chunk, without loading the whole file.
+        """
+        import pandas as pd
+
+        pa = _pyarrow() if self.file_format != "csv" else None
+        if self.file_format == "parquet":
+            for batch in pa.parquet.ParquetFile(self.path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas(types_mapper=_pandas_dtype)
+        elif self.file_format == "feather":
+            with pa.memory_map(self.path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    for offset in range(0, batch.num_rows, chunksize):
+                        yield batch.slice(offset, chunksize).to_pandas(types_mapper=_pandas_dtype)
+        else:
+            yield from pd.read_csv(self.path, chunksize=chunksize)
+
+    def write(self, df):
+        """
+        Writes the DataFrame atomically, the file only appears once it is complete.
+        """
+        with self.open_writer() as writer:
+            writer.write(df)
+
+    @contextmanager
+    def open_writer(self):
+        """
+        Context manager of a chunk writer, every `write(chunk)` appends a chunk to the file.
+        The file is moved in place only when the block succeeds.
+        """
+        with self.temporary_path() as temporary_path:
+            writer = CHUNK_WRITERS[self.file_format](temporary_path, self.compression)
+            try:
+                yield writer
+            except BaseException:
+                # Do not leave a partial file behind
+                writer.close()
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+                raise
+            writer.close()
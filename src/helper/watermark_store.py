@@ -0,0 +1,68 @@
+import json
+import os
+
+
+class WatermarkStore:
+    """
+    Small JSON state store of the high-watermark of every incremental source.
+
+    A new watermark is first recorded as pending by the extract, and only committed once
+    the delta is loaded into the DWH, so a failed run extracts the same delta again
+    instead of losing it.
+
+    Args:
+        path (str): Location of the JSON state file.
+    """
+
+    def __init__(self, path='data/state/watermarks.json'):
+        self.path = path
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _write(self, state):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so the state is never left half written
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+    def get(self, source, column):
+        """
+        Returns the committed watermark of a source, or None when the source has no watermark
+        yet (or it was tracked on another column), meaning everything must be extracted.
+        """
+        entry = self._read().get(source)
+        if not entry or entry.get('column') != column:
+            return None
+        return entry.get('value')
+
+    def set_pending(self, source, column, value):
+        """
+        Records the watermark reached by the latest extract, to be committed after the load.
+        """
+        state = self._read()
+        entry = state.get(source) or {}
+        if entry.get('column') != column:
+            entry = {'column': column, 'value': None}
+        entry['pending'] = value
+        state[source] = entry
+        self._write(state)
+
+    def commit(self, source):
+        """
+        Makes the pending watermark of a source the committed one and returns it.
+        """
+        state = self._read()
+        entry = state.get(source)
+        if not entry or entry.get('pending') is None:
+            return None
+        entry['value'] = entry.pop('pending')
+        self._write(state)
+        return entry['value']
@@ -0,0 +1,83 @@
+import luigi
+from sqlalchemy import text
+
+from src.helper.db_connector import postgres_engine_dwh
+
+# Table of the completion markers of the loads, one row per loaded batch
+LOAD_AUDIT_TABLE = "load_audit"
+
+
+def _advisory_lock(connection, key):
+    # Held until the end of the transaction, concurrent transactions with the same key wait for it
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+
+
+def ensure_load_audit(connection):
+    """
+    Creates the load audit table of a DWH initialised before it existed. Concurrent loads
+    create it one at a time, run it in its own short transaction.
+    """
+    if connection.execute(text("SELECT to_regclass(:table)"), {"table": LOAD_AUDIT_TABLE}).scalar() is not None:
+        return
+    _advisory_lock(connection, LOAD_AUDIT_TABLE)
+    connection.execute(text(f"""CREATE TABLE IF NOT EXISTS "{LOAD_AUDIT_TABLE}"(
+                                    table_name TEXT NOT NULL,
+                                    batch_hash TEXT NOT NULL,
+                                    row_count BIGINT,
+                                    loaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                                    PRIMARY KEY (table_name, batch_hash)
+                                )"""))
+
+
+def record_load(connection, table_name, batch_hash, row_count):
+    """
+    Marks a batch as loaded into a table, in the transaction of the load itself.
+    """
+    ensure_load_audit(connection)
+    connection.execute(text(f'INSERT INTO "{LOAD_AUDIT_TABLE}" (table_name, batch_hash, row_count) '
+                            f'VALUES (:table, :batch, :rows) ON CONFLICT DO NOTHING'),
+                       {"table": table_name, "batch": batch_hash, "rows": row_count})
+
+
+def claim_batch(connection, table_name, batch_hash):
+    """
+    Locks a batch for the transaction of its load and returns False when it was already
+    loaded. Luigi only checks the audit when it schedules the tasks, so the loads of several
+    days with the same data (e.g. the undated marketing CSV) can all start: the first one
+    loads the batch, the others wait for it here and then skip it.
+    """
+    _advisory_lock(connection, f"{LOAD_AUDIT_TABLE}:{table_name}:{batch_hash}")
+    return connection.execute(text(f'SELECT 1 FROM "{LOAD_AUDIT_TABLE}" '
+                                   f'WHERE table_name = :table AND batch_hash = :batch'),
+                              {"table": table_name, "batch": batch_hash}).scalar() is None
+
+
+def batch_loaded(table_name, batch_hash):
+    """
+    Returns True when the batch was already loaded into the table. Read only: the audit table
+    is created by init.sql or by the first load (record_load), before that nothing is loaded.
+    """
+    with postgres_engine_dwh().connect() as connection:
+        if connection.execute(text("SELECT to_regclass(:table)"), {"table": LOAD_AUDIT_TABLE}).scalar() is None:
+            return False
+        return connection.execute(text(f'SELECT 1 FROM "{LOAD_AUDIT_TABLE}" '
+                                       f'WHERE table_name = :table AND batch_hash = :batch'),
+                                  {"table": table_name, "batch": batch_hash}).scalar() is not None
+
+
+class LoadAuditTarget(luigi.Target):
+    """
+    Luigi target of a batch loaded into a DWH table, it exists once the load audit table
+    has the row of the batch. Replaces a local copy of the loaded data as completion marker.
+
+    Args:
+        table_name (str): Table of the data warehouse.
+        batch_hash (str): Hash of the loaded data, None while the data does not exist yet.
+    """
+
+    def __init__(self, table_name, batch_hash):
+        self.table_name = table_name
+        self.batch_hash = batch_hash
+
+    def exists(self):
+        return self.batch_hash is not None and batch_loaded(self.table_name, self.batch_hash)
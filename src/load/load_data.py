@@ -1,17 +1,201 @@
 from src.helper.db_connector import postgres_engine_dwh
+from src.helper.instrumentation import traced
+# The load audit lives in its own module so checking a load does not import pandas, kept importable from here
+from src.load.load_audit import (LOAD_AUDIT_TABLE, LoadAuditTarget, batch_loaded, claim_batch, ensure_load_audit,
+                                 record_load)
+import csv
+import io
 import pandas as pd
-from pangres import upsert
+from sqlalchemy import text
 
 
-dwh_engine = postgres_engine_dwh()
+# Marker of missing values in the COPY buffer, so NULL and empty strings stay different
+COPY_NULL = "\\N"
 
-def load_sales_data(df_sales_clean,dw_table_sales = "sales"):
+
+def copy_insert(pd_table, conn, keys, data_iter):
+    """
+    `DataFrame.to_sql` method that loads every chunk with PostgreSQL `COPY FROM STDIN`
+    from an in-memory CSV buffer, instead of one INSERT per row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([COPY_NULL if value is None else value for value in row] for row in data_iter)
+    buffer.seek(0)
+
+    dbapi_conn = conn.connection
+    columns = ', '.join(f'"{key}"' for key in keys)
+    table_name = f'"{pd_table.schema}"."{pd_table.name}"' if pd_table.schema else f'"{pd_table.name}"'
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+        return cursor.rowcount
+
+
+# Methods of `DataFrame.to_sql`: one INSERT per row, multi-row INSERT, or COPY
+LOAD_METHODS = {
+    "insert": None,
+    "multi": "multi",
+    "copy": copy_insert
+}
+
+
+def append_to_dwh(df, table_name, method="copy", chunksize=50_000, batch_hash=None):
+    """
+    Appends a DataFrame to a table of the data warehouse.
+
+    Parameters:
+    df (DataFrame): Data to load.
+    table_name (str): Table of the data warehouse.
+    method (str): 'insert' (row by row), 'multi' (multi-row INSERT) or 'copy' (COPY FROM STDIN).
+    chunksize (int): Number of rows sent per statement / COPY buffer.
+    batch_hash (str): When given, the batch is recorded in the load audit table in the same transaction,
+        and a batch that is already recorded is not appended again.
+
+    Returns:
+    bool: False when the batch was already loaded and nothing was appended.
+    """
+    if method not in LOAD_METHODS:
+        raise ValueError(f"Unknown load method '{method}', choose one of {list(LOAD_METHODS)}")
+
+    # Multi-row INSERT is limited by the number of bind parameters of one statement
+    if method == "multi":
+        chunksize = min(chunksize, max(1, 30_000 // max(1, len(df.columns))))
+
+    if batch_hash is not None:
+        with postgres_engine_dwh().begin() as connection:
+            ensure_load_audit(connection)
+
+    with postgres_engine_dwh().begin() as connection:
+        if batch_hash is not None and not claim_batch(connection, table_name, batch_hash):
+            print(f"Batch {batch_hash[:12]} of `{table_name}` is already loaded, skipped")
+            return False
+        df.to_sql(name = table_name,
+                  con = connection,
+                  if_exists = "append",
+                  index = False,
+                  method = LOAD_METHODS[method],
+                  chunksize = chunksize)
+        if batch_hash is not None:
+            record_load(connection, table_name, batch_hash, len(df))
+    return True
+
+# Columns identifying a product of the sales data, hashed into the `natural_key` column
+SALES_KEY_COLUMNS = ("link", "name")
+
+
+def copy_dataframe(cursor, df, table_name):
+    """
+    Loads a DataFrame into a table with `COPY FROM STDIN`, from an in-memory CSV buffer.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+    columns = ', '.join(f'"{column}"' for column in df.columns)
+    cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+
+
+def natural_key_expression(key_columns):
+    # md5 of the key columns, NULL and empty strings are hashed the same way
+    parts = " || chr(31) || ".join(f"coalesce(CAST(\"{column}\" AS TEXT), '')" for column in key_columns)
+    return f"md5({parts})"
+
+
+def ensure_sales_natural_key(connection, dw_table_sales = "sales", key_columns = SALES_KEY_COLUMNS):
+    """
+    Migrates a sales table created before the natural key existed: adds and backfills the
+    `natural_key` column, removes the rows with a duplicated key (the highest id is kept),
+    creates the unique index and moves the id sequence after the ids written explicitly
+    by the previous pangres upsert. Does nothing when the unique index already exists.
+    """
+    index_name = f"{dw_table_sales}_natural_key_idx"
+    exists = connection.execute(text("SELECT 1 FROM pg_indexes WHERE tablename = :table AND indexname = :index"),
+                                {"table": dw_table_sales, "index": index_name}).scalar()
+    if exists:
+        return
+
+    connection.execute(text(f'ALTER TABLE "{dw_table_sales}" ADD COLUMN IF NOT EXISTS natural_key TEXT'))
+    connection.execute(text(f'UPDATE "{dw_table_sales}" SET natural_key = {natural_key_expression(key_columns)} '
+                            f'WHERE natural_key IS NULL'))
+    connection.execute(text(f'DELETE FROM "{dw_table_sales}" AS old USING "{dw_table_sales}" AS new '
+                            f'WHERE old.natural_key = new.natural_key AND old.id < new.id'))
+    connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{dw_table_sales}" (natural_key)'))
+    connection.execute(text(f"SELECT setval(pg_get_serial_sequence(:table, 'id'), COALESCE(MAX(id), 0) + 1, false) "
+                            f'FROM "{dw_table_sales}"'), {"table": dw_table_sales})
+
+
+def upsert_sales_data(df_sales_clean, dw_table_sales = "sales", key_columns = SALES_KEY_COLUMNS, batch_hash = None):
+    """
+    Set-based upsert of the sales data on its natural key.
+
+    The batch is copied into a temporary staging table (not WAL-logged), then merged with
+    a single INSERT ... ON CONFLICT DO UPDATE. Rows whose values did not change are not
+    rewritten, so unchanged data produces no WAL and no dead tuples. When the batch holds
+    the same key several times, the last row wins.
+
+    Parameters:
+    df_sales_clean (DataFrame): Transformed sales data, columns named as the DWH table.
+    dw_table_sales (str): Sales table of the data warehouse.
+    key_columns (tuple): Columns hashed into the natural key.
+    batch_hash (str): When given, the batch is recorded in the load audit table in the same transaction,
+        and a batch that is already recorded is not merged again.
+
+    Returns:
+    dict: Number of inserted, updated and unchanged rows, None when the batch was already loaded.
+    """
+    staging_table = f"{dw_table_sales}_staging"
+    columns = [column for column in df_sales_clean.columns if column not in ("id", "natural_key", "created_at")]
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    key = natural_key_expression(key_columns)
+
+    if batch_hash is not None:
+        with postgres_engine_dwh().begin() as connection:
+            ensure_load_audit(connection)
+
+    with postgres_engine_dwh().begin() as connection:
+        if batch_hash is not None and not claim_batch(connection, dw_table_sales, batch_hash):
+            print(f"Batch {batch_hash[:12]} of `{dw_table_sales}` is already loaded, skipped")
+            return None
+        ensure_sales_natural_key(connection, dw_table_sales, key_columns)
+
+        # Staging table with the same column types as the target, dropped at the end of the transaction
+        connection.execute(text(f'CREATE TEMP TABLE "{staging_table}" ON COMMIT DROP AS '
+                                f'SELECT {column_list} FROM "{dw_table_sales}" WITH NO DATA'))
+        connection.execute(text(f'ALTER TABLE "{staging_table}" ADD COLUMN stage_row BIGSERIAL'))
+        with connection.connection.cursor() as cursor:
+            copy_dataframe(cursor, df_sales_clean[columns], f'"{staging_table}"')
+
+        staged = connection.execute(text(f'SELECT COUNT(DISTINCT {key}) FROM "{staging_table}"')).scalar()
+
+        update_set = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in columns)
+        current_values = ", ".join(f'"{dw_table_sales}"."{column}"' for column in columns)
+        new_values = ", ".join(f'EXCLUDED."{column}"' for column in columns)
+        merged = connection.execute(text(
+            f"""INSERT INTO "{dw_table_sales}" ({column_list}, natural_key)
+                SELECT DISTINCT ON (natural_key) {column_list}, natural_key
+                FROM (SELECT {column_list}, stage_row, {key} AS natural_key FROM "{staging_table}") AS staged
+                ORDER BY natural_key, stage_row DESC
+                ON CONFLICT (natural_key) DO UPDATE SET {update_set}
+                WHERE ({current_values}) IS DISTINCT FROM ({new_values})
+                RETURNING (xmax = 0) AS inserted"""
+        )).scalars().all()
+
+        if batch_hash is not None:
+            record_load(connection, dw_table_sales, batch_hash, len(df_sales_clean))
+
+    inserted = sum(1 for row_inserted in merged if row_inserted)
+    report = {
+        "inserted": inserted,
+        "updated": len(merged) - inserted,
+        "unchanged": staged - len(merged)
+    }
+    print(f"Upsert `{dw_table_sales}`: {report['inserted']} inserted, {report['updated']} updated, "
+          f"{report['unchanged']} unchanged")
+    return report
+
+
+@traced("load", table="sales")
+def load_sales_data(df_sales_clean,dw_table_sales = "sales", batch_hash = None):
 # insert data to data warehouse
-    # df_sales_clean.to_sql(name = dw_table_sales,
-    #                         con = dwh_engine,
-    #                         if_exists = "append",
-    #                         index = False)
-    
     # Upsert
     values = {
         "name": "Testing Product",
@@ -30,23 +214,15 @@ def load_sales_data(df_sales_clean,dw_table_sales = "sales"):
     # Add df_upsert to df_sales_clean
     df_sales_clean = pd.concat([df_sales_clean,df_upsert]).reset_index(drop='index')
 
-    df_sales_clean.insert(0,'id',range(0,0+len(df_sales_clean)))
-
-    df_sales_clean = df_sales_clean.set_index('id')
-
-    # Perform the upsert operation
-    upsert(con=dwh_engine, df=df_sales_clean, table_name=dw_table_sales, if_row_exists='update')
+    # Perform the upsert operation, an incremental delta goes through the same merge
+    return upsert_sales_data(df_sales_clean, dw_table_sales, batch_hash = batch_hash)
 
-def load_marketing_data(df_marketing_clean,dw_table_marketing = "marketing"):
+@traced("load", table="marketing")
+def load_marketing_data(df_marketing_clean,dw_table_marketing = "marketing", method = "copy", batch_hash = None):
 # insert data to data warehouse
-    df_marketing_clean.to_sql(name = dw_table_marketing,
-                            con = dwh_engine,
-                            if_exists = "append",
-                            index = False)
+    append_to_dwh(df_marketing_clean, dw_table_marketing, method = method, batch_hash = batch_hash)
     
-def load_scraping_data(df_scraping_clean,dw_table_scraping = "scraping"):
+@traced("load", table="scraping")
+def load_scraping_data(df_scraping_clean,dw_table_scraping = "scraping", method = "copy", batch_hash = None):
 # insert data to data warehouse
-    df_scraping_clean.to_sql(name = dw_table_scraping,
-                            con = dwh_engine,
-                            if_exists = "append",
-                            index = False)
\ No newline at end of file
+    append_to_dwh(df_scraping_clean, dw_table_scraping, method = method, batch_hash = batch_hash)
\ No newline at end of file
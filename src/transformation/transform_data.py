@@ -2,52 +2,108 @@ import pandas as pd
 import numpy as np
 import re
 
-def transform_sales_data(df_sales):
+from src.helper.instrumentation import traced
+
+
+def _to_number(column, pattern, replacement):
+    """
+    Converts a column of formatted numbers to float in one vectorized pass: the pattern is
+    replaced with one regex and pd.to_numeric turns every value that is still not a number
+    (or not a string) into NaN. Columns that are already numeric are returned as float.
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        return column.astype('float64')
+
+    column = column.str.replace(pattern, replacement, regex=True)
+    return pd.to_numeric(column, errors='coerce').astype('float64')
+
+
+class RowHashSet:
+    """
+    Set of the 64-bit hashes of the rows seen so far (8 bytes per distinct row). Used to drop
+    duplicates across the chunks of a streaming transform without keeping the rows themselves
+    in memory.
+
+    The hashes are kept in sorted runs, one per chunk, looked up with searchsorted. A run is
+    merged with the previous one once that one is at most twice as large, so there are only
+    O(log n) runs and every hash is merged O(log n) times, instead of re-sorting the whole set
+    on every chunk.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def _contains(self, hashes):
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            position = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            seen |= run[position] == hashes
+        return seen
+
+    def _add(self, hashes):
+        if not len(hashes):
+            return
+        self.runs.append(np.sort(hashes))
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            # Concatenated sorted runs are merged in linear time by the stable sort (timsort)
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]), kind='stable')
+
+    def first_seen(self, df, subset=None):
+        """
+        Returns a boolean mask of the rows that were not seen before (in this chunk or a
+        previous one) and adds them to the set.
+        """
+        hashes = pd.util.hash_pandas_object(df if subset is None else df[subset], index=False).to_numpy()
+        first = ~self._contains(hashes) & ~pd.Series(hashes).duplicated().to_numpy()
+        self._add(hashes[first])
+        return first
+
+
+def _drop_duplicates(df, subset=None, seen_rows=None):
+    # Without a RowHashSet the duplicates are only dropped within the DataFrame
+    if seen_rows is None:
+        return df.drop_duplicates(subset=subset)
+    return df[seen_rows.first_seen(df, subset)]
+
+
+@traced("transform", table="sales")
+def transform_sales_data(df_sales, seen_rows=None):
     """
     Cleans and transforms the sales data by handling duplicates, missing values, 
     converting columns to appropriate data types, and removing unnecessary columns.
 
     Parameters:
     df_sales (DataFrame): The DataFrame containing sales data that needs transformation.
+    seen_rows (RowHashSet): Rows of the previous chunks when the data is transformed chunk by chunk.
 
     Returns:
     DataFrame: The cleaned and transformed DataFrame.
     """
     
-    # Drop the 'Unnamed: 0' column if it exists, as it's often an index or unnecessary column.
-    if 'Unnamed: 0' in df_sales.columns:
-        df_sales = df_sales.drop('Unnamed: 0', axis=1)
+    # Remove duplicate rows, ignoring the 'Unnamed: 0' index column which is dropped afterwards.
+    # Dropping it only from the deduplicated rows saves a copy of the whole table.
+    columns = [column for column in df_sales.columns if column != 'Unnamed: 0']
+    df_sales = _drop_duplicates(df_sales, columns, seen_rows)[columns]
 
-    # Remove duplicate rows from the DataFrame.
-    df_sales = df_sales.drop_duplicates()
-
-    # Function to convert ratings from string to float. Handles cases where commas are used as decimal points.
-    def clean_ratings(ratings):
-        try:
-            return float(ratings.replace(',', '.'))
-        except:
-            return np.nan  # Returns nan if conversion fails (e.g., missing or invalid values)
-
-    # Function to convert the number of ratings from string to integers, removing commas and dots.
-    def clean_no_ratings(no_ratings):
-        try:
-            return int(no_ratings.replace(',', '').replace('.', ''))
-        except:
-            return np.nan # Returns nan for consistency with other missing values
-
-    # Apply the cleaning functions to the 'ratings' and 'no_of_ratings' columns.
-    df_sales['ratings'] = df_sales['ratings'].apply(clean_ratings).fillna(0)
-    df_sales['no_of_ratings'] = df_sales['no_of_ratings'].apply(clean_no_ratings)
+    # Ratings use either a dot or a comma as decimal point. Values that are not a number
+    # (e.g. 'Get', 'FREE Delivery by Amazon' or missing) become NaN and then 0.
+    df_sales['ratings'] = _to_number(df_sales['ratings'], r',', '.').fillna(0)
 
-    # Clean the price columns: remove currency symbols and commas, then convert the result to float.
-    df_sales['actual_price'] = df_sales['actual_price'].str.replace('₹', '').str.replace(',', '').replace('', np.nan).astype('float')
-    df_sales['discount_price'] = df_sales['discount_price'].str.replace('₹', '').str.replace(',', '').replace('', np.nan).astype('float')
+    # The number of ratings uses commas and dots as thousands separators, stored as a nullable integer.
+    # 'inf' / 'nan' are not a count, they become missing like the other text.
+    no_of_ratings = _to_number(df_sales['no_of_ratings'], r'[,.]', '')
+    df_sales['no_of_ratings'] = no_of_ratings.where(np.isfinite(no_of_ratings)).round().astype('Int64')
 
-    # Handle missing values: Fill missing 'ratings' with 0.
-    df_sales['ratings'] = df_sales['ratings'].fillna(0)
+    # Clean the price columns: remove currency symbols and commas, then convert the result to float.
+    df_sales['actual_price'] = _to_number(df_sales['actual_price'], r'[₹,]', '')
+    df_sales['discount_price'] = _to_number(df_sales['discount_price'], r'[₹,]', '')
 
     # For rows with missing 'discount_price', fill it with the value from 'actual_price'.
-    df_sales.loc[df_sales['discount_price'].isna(), 'discount_price'] = df_sales.loc[df_sales['discount_price'].isna(), 'actual_price']
+    df_sales['discount_price'] = df_sales['discount_price'].fillna(df_sales['actual_price'])
 
     # Drop rows where 'actual_price' is missing, as it's essential for analysis.
     df_sales = df_sales.dropna(subset='actual_price')
@@ -55,71 +111,108 @@ def transform_sales_data(df_sales):
     return df_sales  # Return the cleaned DataFrame
 
 
-def transform_marketing_data(df_marketing):
+# Weight in pounds and/or ounces, handling variations like 'lbs', 'pounds', 'oz' or 'ounces'
+POUNDS_PATTERN = re.compile(r'(\d*\.?\d+)\s?(?:lbs?|pounds?)')
+OUNCES_PATTERN = re.compile(r'(\d*\.?\d+)\s?(?:oz|ounces?)')
+
+# Standardized value of 'prices.availability' (compared in uppercase), other values are kept in uppercase
+PRICES_AVAILABILITY = {
+    **dict.fromkeys(['YES', 'TRUE', 'SPECIAL ORDER', 'IN STOCK', '32 AVAILABLE', '7 AVAILABLE'], 'YES'),
+    **dict.fromkeys(['UNDEFINED', 'OUT OF STOCK', 'NO', 'MORE ON THE WAY', 'SOLD', 'FALSE', 'RETIRED'], 'NO')
+}
+
+
+def _map_distinct(column, function):
+    """
+    Applies a vectorized function to the distinct values of a column only and spreads the
+    result back over the rows. Missing values stay missing.
+    """
+    codes, uniques = pd.factorize(column)
+    values = function(pd.Series(uniques, dtype=object)).to_numpy()
+    if (codes < 0).any():
+        # Missing values have code -1, which takes the trailing NaN
+        values = np.append(values, np.nan)
+    return pd.Series(values.take(codes), index=column.index, name=column.name)
+
+
+def _weight_in_pounds(weight):
+    """
+    Converts weights like '1.2 pounds', '14 oz' or '3 lbs 2 oz' to pounds (1 pound = 16 ounces).
+    A string without pounds or ounces is 0, a missing weight is NaN.
+    """
+    def to_pounds(weights):
+        pounds = pd.to_numeric(weights.str.extract(POUNDS_PATTERN, expand=False)).fillna(0)
+        ounces = pd.to_numeric(weights.str.extract(OUNCES_PATTERN, expand=False)).fillna(0)
+        return (pounds + ounces / 16).where(weights.str.len().notna())
+
+    return _map_distinct(weight, to_pounds).astype('float64')
+
+
+def _normalise_availability(availability):
+    """
+    Standardizes 'prices.availability' to 'YES' or 'NO', other values are kept in uppercase.
+    """
+    def normalise(values):
+        values = values.str.upper()
+        return values.map(PRICES_AVAILABILITY).fillna(values)
+
+    return _map_distinct(availability, normalise)
+
+
+def _shipping_cost(shipping):
+    """
+    Parses 'prices.shipping' to an integer: 'USD 25.00' becomes 2500, shipping without
+    a USD amount (free, value, freight or missing) costs 0.
+    """
+    def parse(values):
+        usd_amount = values.str.replace('USD', '', regex=False).str.replace('.', '', regex=False)
+        return usd_amount.where(values.str.contains('USD', regex=False), 0)
+
+    return _map_distinct(shipping.fillna('free'), parse).astype('int')
+
+
+def _clean_condition(condition):
+    return condition.str.upper().str.replace('NEW OTHER (SEE DETAILS)', 'NEW')
+
+
+def unwanted_conditions(condition):
+    """
+    Returns the cleaned 'prices.condition' values dropped by transform_marketing_data:
+    the last 2 distinct values, in order of appearance over the whole dataset.
+    """
+    return list(_clean_condition(condition).unique()[-2:])
+
+
+@traced("transform", table="marketing")
+def transform_marketing_data(df_marketing, dropped_conditions=None, seen_rows=None):
     """
     Cleans and transforms the marketing data by handling duplicates, missing values, 
     converting weights to pounds, and standardizing price availability and condition.
 
     Parameters:
     df_marketing (DataFrame): The DataFrame containing marketing data that needs transformation.
+    dropped_conditions (list): Values of 'prices.condition' to drop, computed from df_marketing by default.
+                               A chunk needs the values of the whole dataset (see unwanted_conditions).
+    seen_rows (RowHashSet): Rows of the previous chunks when the data is transformed chunk by chunk.
 
     Returns:
     DataFrame: The cleaned and transformed DataFrame.
     """
     
-    # Function to clean the 'prices.availability' column by standardizing certain values to 'YES' or 'NO'.
-    def cleaning_unique_values_prices_availability(prices_availability):
-        prices_availability = prices_availability.upper()  # Convert the text to uppercase for consistency
-        yes_availabilty = ['YES', 'TRUE', 'SPECIAL ORDER', 'IN STOCK', '32 AVAILABLE', '7 AVAILABLE']
-        no_availabilty = ['UNDEFINED', 'OUT OF STOCK', 'NO', 'MORE ON THE WAY', 'SOLD', 'FALSE', 'RETIRED']
-
-        # If the value matches a 'yes' condition, return 'YES', otherwise return 'NO' for the 'no' condition.
-        if prices_availability in yes_availabilty:
-            return 'YES'
-        elif prices_availability in no_availabilty:
-            return 'NO'
-
-        return prices_availability  # Return the original value if no match found.
-
-    # Function to convert weight from a string format containing pounds and/or ounces into pounds as float.
-    def convert_to_pounds(weight_str):
-        try:
-            pounds = 0
-            ounces = 0
-
-            # Conversion factor from ounces to pounds (1 pound = 16 ounces)
-            ounces_to_pounds = 1 / 16
-
-            # Extract the pounds from the string (if any), handling variations like 'lbs' or 'pounds'
-            pounds_match = re.search(r'(\d*\.?\d+)\s?(?:lbs?|pounds?)', weight_str)
-            if pounds_match:
-                pounds = float(pounds_match.group(1))
-
-            # Extract the ounces from the string (if any), handling variations like 'oz' or 'ounces'
-            ounces_matches = re.search(r'(\d*\.?\d+)\s?(?:oz|ounces?)', weight_str)
-            if ounces_matches:
-                ounces = float(ounces_matches.group(1))
-
-            # Convert ounces to pounds and add to the pounds value.
-            total_pounds = pounds + (ounces * ounces_to_pounds)
-            return total_pounds
-        except:
-            return np.nan  # Return nan if conversion fails.
-
     # Drop the 'Unnamed: 0' column if it exists, as it's often unnecessary.
     if 'Unnamed: 0' in df_marketing.columns:
         df_marketing = df_marketing.drop('Unnamed: 0', axis=1)
 
     # Remove duplicate rows from the DataFrame.
-    df_marketing = df_marketing.drop_duplicates()
+    df_marketing = _drop_duplicates(df_marketing, seen_rows=seen_rows)
 
     # Change name of columns "id" to "product_id"
     df_marketing = df_marketing.rename(columns={'id':'product_id'})
 
     # Apply data cleaning functions.
-    df_marketing['weightInPounds'] = df_marketing['weight'].apply(convert_to_pounds)  # Convert weight to pounds.
-    df_marketing['prices.availability'] = df_marketing['prices.availability'].apply(cleaning_unique_values_prices_availability)  # Standardize availability.
-    df_marketing['prices.condition'] = df_marketing['prices.condition'].str.upper().str.replace('NEW OTHER (SEE DETAILS)', 'NEW')  # Clean and standardize condition.
+    df_marketing['weightInPounds'] = _weight_in_pounds(df_marketing['weight'])  # Convert weight to pounds.
+    df_marketing['prices.availability'] = _normalise_availability(df_marketing['prices.availability'])  # Standardize availability.
+    df_marketing['prices.condition'] = _clean_condition(df_marketing['prices.condition'])  # Clean and standardize condition.
     
     # Mengubah kolom menjadi datetime
     df_marketing['dateAdded'] = pd.to_datetime(df_marketing['dateAdded'])
@@ -127,12 +220,12 @@ def transform_marketing_data(df_marketing):
 
 
     # Drop rows where 'prices.condition' contains unwanted values (the last 2 unique values).
-    df_marketing = df_marketing[~(df_marketing['prices.condition'].isin(list(df_marketing['prices.condition'].unique()[-2:])))]
+    if dropped_conditions is None:
+        dropped_conditions = list(df_marketing['prices.condition'].unique()[-2:])
+    df_marketing = df_marketing[~(df_marketing['prices.condition'].isin(dropped_conditions))]
 
     # Clean the 'prices.shipping' column, removing 'USD' and converting it to integer.
-    df_marketing['prices.shipping'] = df_marketing['prices.shipping'].fillna('free').apply(
-        lambda x: 0 if 'USD' not in x else x.replace('USD', '').replace('.', '')
-    ).astype('int')
+    df_marketing['prices.shipping'] = _shipping_cost(df_marketing['prices.shipping'])
 
     # Drop any columns containing 'UNNAMED' in their name and the 'weight' column.
     for col in df_marketing.columns:
@@ -170,13 +263,15 @@ def transform_marketing_data(df_marketing):
     return df_marketing  # Return the cleaned DataFrame
 
 
-def transform_scraping_data(df_scraping):
+@traced("transform", table="scraping")
+def transform_scraping_data(df_scraping, seen_rows=None):
     """
     Transforms and cleans the scraped data by handling missing values, filling them with default values,
     and dropping unnecessary columns.
     
     Parameters:
     df_scraping (DataFrame): The DataFrame containing the scraped data that needs transformation.
+    seen_rows (RowHashSet): Rows of the previous chunks when the data is transformed chunk by chunk.
 
     Returns:
     DataFrame: The cleaned and transformed DataFrame.
@@ -206,6 +301,38 @@ def transform_scraping_data(df_scraping):
     df_scraping = df_scraping.drop('topik_pilihan_link', axis=1)
 
     # Drop duplicates data
-    df_scraping = df_scraping.drop_duplicates()
+    df_scraping = _drop_duplicates(df_scraping, seen_rows=seen_rows)
 
     return df_scraping  # Return the cleaned DataFrame
+
+
+@traced("transform")
+def transform_in_chunks(chunks, transform, writer, dtype_plan=None, **kwargs):
+    """
+    Streaming mode of the transforms: applies `transform` chunk by chunk and appends every
+    transformed chunk to `writer`, so only one chunk is in memory at a time. Duplicates are
+    dropped across chunks with a RowHashSet.
+
+    Parameters:
+    chunks (iterable): DataFrames to transform, e.g. DataFrameTarget.iter_chunks().
+    transform (function): transform_sales_data, transform_marketing_data or transform_scraping_data.
+    writer: Chunk writer with a write(df) method, e.g. from DataFrameTarget.open_writer().
+    dtype_plan (ChunkDtypePlan): Compact dtypes applied to every transformed chunk, None keeps the dtypes.
+    **kwargs: Extra arguments of the transform (dropped_conditions of the marketing data).
+
+    Returns:
+    dict: Number of rows read and written.
+    """
+    seen_rows = RowHashSet()
+    report = {'rows_in': 0, 'rows_out': 0}
+    for chunk in chunks:
+        report['rows_in'] += len(chunk)
+        chunk = transform(chunk, seen_rows=seen_rows, **kwargs)
+        if len(chunk):
+            if dtype_plan is not None:
+                chunk = dtype_plan.apply(chunk)
+            writer.write(chunk)
+            report['rows_out'] += len(chunk)
+
+    print(f"Transformed {report['rows_in']} rows into {report['rows_out']} rows chunk by chunk")
+    return report
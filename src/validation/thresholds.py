@@ -0,0 +1,57 @@
+import json
+
+# Declarative thresholds of every table, see check_thresholds
+THRESHOLDS_PATH = 'src/validation/thresholds.json'
+
+
+def load_thresholds(path=THRESHOLDS_PATH):
+    """
+    Reads the thresholds of every table from a JSON file, {table: {rule: limit}}.
+    """
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _per_column(limits, column):
+    # A limit per column, or '*' for every column without its own
+    return limits.get(column, limits.get('*'))
+
+
+def check_thresholds(report, thresholds):
+    """
+    Checks a report against the thresholds of its table. Supported rules:
+
+    - min_rows: minimum number of rows
+    - required_columns: columns that must exist
+    - max_duplicate_ratio: maximum share of duplicate rows
+    - max_missing_ratio: {column or '*': maximum share of missing values}
+    - min_distinct: {column or '*': minimum number of distinct values}
+
+    Returns:
+        list: Description of every broken threshold, empty when the data is valid.
+    """
+    violations = []
+    table = report['table']
+    column_stats = report['column_stats']
+
+    if 'min_rows' in thresholds and report['rows'] < thresholds['min_rows']:
+        violations.append(f"`{table}` has {report['rows']} rows, expected at least {thresholds['min_rows']}")
+
+    for column in thresholds.get('required_columns', []):
+        if column not in column_stats:
+            violations.append(f"`{table}` has no column `{column}`")
+
+    if 'max_duplicate_ratio' in thresholds and report['duplicate_ratio'] > thresholds['max_duplicate_ratio']:
+        violations.append(f"`{table}` has {report['duplicate_ratio']:.1%} duplicate rows, "
+                          f"expected at most {thresholds['max_duplicate_ratio']:.1%}")
+
+    for column, stats in column_stats.items():
+        limit = _per_column(thresholds.get('max_missing_ratio', {}), column)
+        if limit is not None and stats['missing_ratio'] > limit:
+            violations.append(f"Column `{column}` of `{table}` has {stats['missing_ratio']:.1%} missing values, "
+                              f"expected at most {limit:.1%}")
+        limit = _per_column(thresholds.get('min_distinct', {}), column)
+        if limit is not None and stats['distinct'] < limit:
+            violations.append(f"Column `{column}` of `{table}` has {stats['distinct']} distinct values, "
+                              f"expected at least {limit}")
+    return violations
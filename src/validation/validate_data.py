@@ -1,65 +1,177 @@
+import numpy as np
 import pandas as pd
 
-## Cek Shape data
-def check_shape_data(df,nama_tabel):
-    print("CHECKING SHAPE DATA")
-    rows_amount = df.shape[0]
-    columns_amount = df.shape[1]
+from src.helper.instrumentation import span
+# Kept importable from here, the thresholds do not need numpy or pandas
+from src.validation.thresholds import THRESHOLDS_PATH, check_thresholds, load_thresholds
 
-    print(f'Data {nama_tabel} has {rows_amount} rows and {columns_amount} columns\n')
+# Number of distinct values kept per column in the report
+SAMPLE_SIZE = 20
 
-## Cek tipe data
-def check_type_data(df, table_name):
-    print("CHECKING DATA TYPE")
-    print(f'Each column in {table_name} has the following data types:\n')
-    for column in df.columns:
-        print(f'Column `{column}` has data type {df[column].dtype}')
-    print()
+# Above this many rows, distinct values are counted with HyperLogLog instead of exactly
+EXACT_DISTINCT_MAX_ROWS = 1_000_000
 
-## Check missing value
-def check_missing_values(df, table_name):
-    print("CHECKING MISSING DATA")
-    print(f'Each column in `{table_name}` has the following number of missing values:\n')
-    for column in df.columns:
-        missing_values = df[column].isnull().sum()
-        percentage_missing_values = round(missing_values/len(df)*100,1)
-        print(f'Column `{column}` has {missing_values} or {percentage_missing_values}% missing values')
-    print()
-
-
-## Check duplicate
-def check_duplicates(df, table_name):
-    print("CHECKING DATA DUPLICATES")
-    duplicate_count = len(df[df.duplicated()])
-    print(f"`{table_name}` has {duplicate_count} duplicate entries \n")
-
-## Check unique values
-def check_unique_values(df,table_name):
-    print("CHECKING UNIQUE VALUES")
-    print(f'Each column in `{table_name}` has the following number of missing values:\n')
+# 2 ** 14 HyperLogLog registers, a standard error of about 0.8%
+HLL_PRECISION = 14
+
+
+class ValidationError(Exception):
+    """
+    Raised when a dataset breaks one of the thresholds of its table.
+    """
+
+
+def _mix(values):
+    # splitmix64 finalizer, spreads factorize codes over 64 bits before they are combined
+    with np.errstate(over='ignore'):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def _combine_row_hashes(row_hashes, column_hashes):
+    # Same mixing as the row hashes of pandas, a multiply then xor per column (wraps around)
+    with np.errstate(over='ignore'):
+        return row_hashes * np.uint64(1000003) ^ column_hashes
+
+
+def _bit_length(values):
+    # Exact bit length of uint64 values, in two 32-bit halves a float64 represents exactly
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+
+
+def approximate_distinct(hashes, precision=HLL_PRECISION):
+    """
+    HyperLogLog estimate of the number of distinct values from their 64-bit hashes.
+    """
+    if len(hashes) == 0:
+        return 0
+    registers_count = 1 << precision
+    # The first bits choose the register, the rank is the position of the first 1 in the others
+    index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    rest = hashes << np.uint64(precision)
+    rank = np.where(rest == 0, 64 - precision + 1, 64 - _bit_length(rest) + 1).astype(np.uint8)
+    registers = np.zeros(registers_count, dtype=np.uint8)
+    np.maximum.at(registers, index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / registers_count)
+    estimate = alpha * registers_count ** 2 / np.sum(np.exp2(-registers.astype(np.float64)))
+    empty = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * registers_count and empty:
+        # Small cardinalities: linear counting of the empty registers is more accurate
+        estimate = registers_count * np.log(registers_count / empty)
+    return int(round(estimate))
+
+
+def _sample(values, sample_size, rng):
+    # Random subset of the values, in their original order
+    if len(values) <= sample_size:
+        return values
+    return values[np.sort(rng.choice(len(values), sample_size, replace=False))]
+
+
+def _profile_exact(column, sample_size, rng):
+    # One factorize gives the missing values (code -1), the distinct values and a code per row
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    missing = int(np.count_nonzero(codes == -1))
+    sample = _sample(np.asarray(uniques, dtype=object), sample_size, rng)
+    return missing, len(uniques), sample, _mix(codes.astype(np.uint64))
+
+
+def _profile_approximate(column, sample_size, rng):
+    # Hashes without a table of the distinct values, so memory does not grow with them
+    hashes = pd.util.hash_pandas_object(column, index=False, categorize=False).to_numpy()
+    present = column.notna().to_numpy()
+    missing = len(column) - int(np.count_nonzero(present))
+    # Distinct values of a sample of the rows
+    rows = _sample(np.flatnonzero(present), sample_size * 10, rng)
+    sample = pd.unique(column.to_numpy(dtype=object)[rows])[:sample_size]
+    return missing, approximate_distinct(hashes[present]), sample, hashes
+
+
+def _json_value(value):
+    # numpy scalars (and NaN) are not valid JSON
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def profile_data(df, table_name, sample_size=SAMPLE_SIZE, exact_distinct_max_rows=EXACT_DISTINCT_MAX_ROWS, seed=0):
+    """
+    Computes the validation statistics of a DataFrame in one pass over every column:
+    missing values, distinct values (exact, or HyperLogLog on large data), a random sample
+    of the distinct values, the range of numeric columns and the number of duplicate rows.
+
+    Returns:
+        dict: JSON serializable report of the table and every column.
+    """
+    rows = len(df)
+    exact = rows <= exact_distinct_max_rows
+    profile_column = _profile_exact if exact else _profile_approximate
+    rng = np.random.default_rng(seed)
+    row_hashes = np.zeros(rows, dtype=np.uint64)
+
+    columns = {}
     for column in df.columns:
-        unique_values = df[column].unique()
-        if len(unique_values)<=100:
-            print(f'''Jumlah unique values pada kolom `{column} `adalah sebanyak : {len(unique_values)} yaitu : \n {unique_values}\n''')
-        else:
-            print(f'''Jumlah unique values pada kolom `{column}` adalah sebanyak : {len(unique_values)}\n''')
+        missing, distinct, sample, hashes = profile_column(df[column], sample_size, rng)
+        # Duplicate rows are found from the combined hashes, without a copy of the rows
+        row_hashes = _combine_row_hashes(row_hashes, hashes)
+        stats = {
+            'dtype': str(df[column].dtype),
+            'missing': missing,
+            'missing_ratio': round(missing / rows, 4) if rows else 0.0,
+            'distinct': distinct,
+            'sample_values': [_json_value(value) for value in sample],
+        }
+        if pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+            stats['min'] = _json_value(df[column].min())
+            stats['max'] = _json_value(df[column].max())
+        columns[str(column)] = stats
 
+    duplicates = int(pd.Series(row_hashes).duplicated().sum()) if len(df.columns) else 0
+    return {
+        'table': table_name,
+        'rows': rows,
+        'columns': len(df.columns),
+        'duplicates': duplicates,
+        'duplicate_ratio': round(duplicates / rows, 4) if rows else 0.0,
+        'distinct_method': 'exact' if exact else 'hyperloglog',
+        'column_stats': columns,
+    }
 
-def validation_process(df, table_name):
-    #Calculate Percentage of Missing Value
-    print(f"========== Start {table_name} Pipeline Validation ==========")
-    # check data shape
-    check_shape_data(df,table_name)
 
-    ## Cek tipe data
-    check_type_data(df, table_name)
+def format_report(report):
+    """
+    Formats a report as the summary printed by validation_process.
+    """
+    lines = [f"Data {report['table']} has {report['rows']} rows and {report['columns']} columns, "
+             f"{report['duplicates']} duplicate rows ({report['distinct_method']} distinct counts)"]
+    for column, stats in report['column_stats'].items():
+        lines.append(f"  {column:<25} {stats['dtype']:>15}  missing {stats['missing']:>9} "
+                     f"({stats['missing_ratio']:6.1%})  distinct {stats['distinct']:>9}")
+    for violation in report.get('violations', []):
+        lines.append(f"  FAILED: {violation}")
+    return '\n'.join(lines)
+
 
-    ## Check missing value
-    check_missing_values(df, table_name)
-    
-    ## Check duplicate
-    check_duplicates(df, table_name)
+def validation_process(df, table_name, thresholds=None, sample_size=SAMPLE_SIZE,
+                       exact_distinct_max_rows=EXACT_DISTINCT_MAX_ROWS):
+    """
+    Profiles a DataFrame, checks it against the thresholds of its table and prints a summary.
 
-    ## Check unique values
-    check_unique_values(df,table_name)
-    print("========== End Pipeline Validation ==========")
\ No newline at end of file
+    Returns:
+        dict: The report of profile_data, with the `violations` found and whether it `passed`.
+    """
+    print(f"========== Start {table_name} Pipeline Validation ==========")
+    with span('validate', table=table_name, function='validation_process', rows_in=len(df)) as record:
+        report = profile_data(df, table_name, sample_size=sample_size, exact_distinct_max_rows=exact_distinct_max_rows)
+        report['violations'] = check_thresholds(report, thresholds or {})
+        report['passed'] = not report['violations']
+        record['violations'] = len(report['violations'])
+    print(format_report(report))
+    print("========== End Pipeline Validation ==========")
+    return report
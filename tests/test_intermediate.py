@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from src.helper.dtype_planner import STRING_DTYPE, compact_dtypes
+from src.helper.intermediate import DataFrameTarget
+
+
+@pytest.fixture
+def compacted():
+    df = pd.DataFrame({
+        "judul": [f"Judul {i}" for i in range(6)],
+        "isi_berita": [f"Isi berita {i}" for i in range(5)] + [None],
+        "topik": ["Nasional", "Regional"] * 3,
+        "redaksi": ["A", "B", "C", "D", "E", "F"],
+    })
+    df, _ = compact_dtypes(df, "scraping")
+    return df
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_compact_dtypes_survive_round_trip(tmp_path, compacted, file_format):
+    assert compacted["isi_berita"].dtype == STRING_DTYPE
+    target = DataFrameTarget(str(tmp_path / "transform_scraping_data"), file_format=file_format)
+    target.write(compacted)
+
+    pd.testing.assert_series_equal(target.read().dtypes, compacted.dtypes)
+    pd.testing.assert_frame_equal(target.read(), compacted)
+    for chunk in target.iter_chunks(chunksize=4):
+        pd.testing.assert_series_equal(chunk.dtypes, compacted.dtypes)
+    assert target.read(columns=["isi_berita"])["isi_berita"].dtype == STRING_DTYPE